@@ -1,4 +1,5 @@
 import os
+import tempfile
 import base64
 from datetime import datetime
 import numpy as np
@@ -19,55 +20,17 @@ import re
 import json
 import requests, io
 from urllib.parse import quote_plus
-
-@st.cache_data(ttl=3600)
-def estimate_redfin_arv(address, city, state, zip_code):
-    """Fetch average sold price from Redfin CSV API with robust fallback."""
-    q = quote_plus(f"{address}, {city}, {state} {zip_code}")
-    url = f"https://www.redfin.com/stingray/api/gis-csv?al=1&include=sold&location={q}"
-    resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-    text = resp.text.strip()
-
-    # 1) Catch Redfin error responses
-    if text.startswith("["):
-        m = re.search(r'\{.*\}', text)
-        if m:
-            err = json.loads(m.group(0))
-            st.warning(f"Redfin error for {address}: {err.get('errorMessage')}")
-        else:
-            st.warning(f"Unexpected Redfin response for {address}")
-        return None
-
-    # 2) Parse CSV
-    df = pd.read_csv(io.StringIO(text))
-
-    # 3) Try obvious column names
-    candidates = [c for c in df.columns if re.search(r"(price|sale)", c, re.IGNORECASE)]
-    price_col = candidates[0] if candidates else None
-
-    # 4) Fallback: find any column where >50% of entries parse as numbers
-    if not price_col:
-        for c in df.columns:
-            cleaned = (
-                df[c].astype(str)
-                      .str.replace(r"[^\d\.]", "", regex=True)
-            )
-            nums = pd.to_numeric(cleaned, errors="coerce")
-            if nums.notna().sum() / len(nums) > 0.5:
-                price_col = c
-                break
-
-    if not price_col:
-        st.warning(f"No numeric price column for {address}; skipping ARV.")
-        return None
-
-    # 5) Clean & average
-    df[price_col] = (
-        df[price_col].astype(str)
-                     .replace(r"[\$,]", "", regex=True)
-                     .astype(float)
-    )
-    return df[price_col].mean()
+from utils import export
+from utils import enrichment
+from utils.rules import RULES
+from utils.topk import RANK_KEYS, TopK
+from utils.geocode import map_urls
+from utils.jobs import JobQueue
+from utils import frame_cache
+from utils.search import SearchIndex
+from utils import timeseries
+from utils import deals
+from utils import importer
 
 # ───── Page config MUST be first Streamlit call ─────
 st.set_page_config(
@@ -189,8 +152,7 @@ def tag_motivation(text):
 # ---------------------------------
 # Data Fetching Functions
 # ---------------------------------
-@st.cache_data(ttl=300)
-def get_craigslist_data():
+def _build_craigslist_data():
     resp = supabase.table("craigslist_leads").select("*").order("date_posted", desc=True).execute()
     df = pd.DataFrame(resp.data or [])
     if df.empty:
@@ -203,12 +165,7 @@ def get_craigslist_data():
     df["motivation"] = df["title"].apply(tag_motivation)
     return df.dropna(subset=["title", "date_posted"])
 
-@st.cache_data(ttl=300)
-def get_propstream_data():
-    resp = supabase.table("propstream_leads").select("*").order("date_posted", desc=True).execute()
-    df = pd.DataFrame(resp.data or [])
-    if df.empty:
-        return df
+def _prepare_propstream(df: pd.DataFrame) -> pd.DataFrame:
     for col in ["price", "arv", "equity", "category"]:
         df[col] = df.get(col, 0 if col != "category" else "").fillna(0)
     df = df.replace([np.inf, -np.inf], np.nan)
@@ -220,6 +177,172 @@ def get_propstream_data():
     df["motivation"] = df["title"].apply(tag_motivation)
     return df.dropna(subset=["title", "date_posted"])
 
+def _build_propstream_data():
+    resp = supabase.table("propstream_leads").select("*").order("date_posted", desc=True).execute()
+    df = pd.DataFrame(resp.data or [])
+    if df.empty:
+        return df
+    return _prepare_propstream(df)
+
+# Lead frames are shared by every worker process through an on-disk Arrow
+# cache; only a changed table (row count / newest post) triggers a rebuild.
+def get_craigslist_data():
+    return frame_cache.load_frame(
+        "craigslist_leads", _build_craigslist_data,
+        lambda: frame_cache.table_version(supabase, "craigslist_leads"),
+    ).copy(deep=False)
+
+def get_propstream_data():
+    return frame_cache.load_frame(
+        "propstream_leads", _build_propstream_data,
+        lambda: frame_cache.table_version(supabase, "propstream_leads"),
+    ).copy(deep=False)
+
+@st.cache_resource(max_entries=1)
+def _top_leads(frame_epoch):
+    """Process-wide top-50 trackers: overall, per ZIP and per category.
+    New rows are merged incrementally; keyed on the shared frame's epoch, so
+    every worker starts over only after deletes or edits (max-age rebuild)."""
+    return {by: TopK(k=50, by=by) for by in [None, "zip", "category"]}
+
+@st.cache_resource
+def _job_queue():
+    """Process-wide enrichment workers; resumes jobs a restart interrupted."""
+    jobs = JobQueue(handlers={
+        "enrich": (
+            enrichment.enrich_row,
+            lambda df, params: enrichment.store_enriched(supabase, df),
+            enrichment.plan_enrichment,
+        ),
+    })
+    jobs.resume()
+    return jobs
+
+@st.cache_resource
+def _search_index():
+    return SearchIndex()
+
+def search_leads(df: pd.DataFrame, source: str, key_col: str) -> pd.DataFrame:
+    """Search box over titles/descriptions; returns ranked matching rows."""
+    q = st.text_input(
+        "🔎 Search titles & descriptions",
+        placeholder="probate, foreclosure, needs roof…",
+        key=f"search_{source}",
+    )
+    if not q:
+        return df
+    index = _search_index()
+    index.sync_frame(df, source, key_col, body_col="description")
+    hits = index.search(q, source=source)
+    df = (
+        df.assign(_key=df[key_col].astype(str))
+          .merge(hits.rename(columns={"snippet": "Match"}), left_on="_key", right_on="lead_key")
+          .sort_values("rank")
+          .drop(columns=["_key", "lead_key", "rank"])
+    )
+    st.caption(f"{len(df)} matches for “{q}”")
+    return df
+
+CHART_MODES = {"W": "Weekly min/median/max", "D": "Daily min/median/max", "LTTB": "Shape-preserving sample"}
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def price_series(_df: pd.DataFrame, data_version, filter_key, mode: str) -> pd.DataFrame:
+    """Bounded price-over-time series, cached per data version + filters
+    (the frame itself is not hashed)."""
+    if mode == "LTTB":
+        cols = [c for c in ["date_posted","price","source","title","arv","equity"] if c in _df.columns]
+        return timeseries.downsample(_df, "date_posted", "price", "source")[cols]
+    return timeseries.resample(_df, "date_posted", "price", "source", freq=mode)
+
+def price_chart(series: pd.DataFrame, mode: str):
+    if mode == "LTTB":
+        return alt.Chart(series).mark_line().encode(
+            x="date_posted:T", y="price:Q", color="source:N",
+            tooltip=[c for c in ["source","title","price","arv","equity"] if c in series.columns]
+        )
+    base = alt.Chart(series).encode(
+        x=alt.X("bucket:T", title="date_posted"),
+        color=alt.Color("group:N", title="source"),
+    )
+    band = base.mark_area(opacity=0.2).encode(y=alt.Y("min:Q", title="price"), y2="max:Q")
+    line = base.mark_line(point=True).encode(
+        y="median:Q", tooltip=["group","bucket:T","min","median","max","count"]
+    )
+    return band + line
+
+# ---------------------------------
+# Top 50 Leads (demo nav)
+# ---------------------------------
+if demo_page == "Top 50 Leads":
+    st.header("🏆 Top 50 Leads")
+    leads = get_propstream_data()
+    trackers = _top_leads(frame_cache.frame_epoch("propstream_leads"))
+    watermark = trackers[None].watermark
+    if watermark is None:
+        new_rows = leads
+    else:
+        # only leads posted since the last merge need ranking
+        resp = supabase.table("propstream_leads").select("*").gt("date_posted", watermark.isoformat()).execute()
+        new_rows = pd.DataFrame(resp.data or [])
+        if not new_rows.empty:
+            new_rows = _prepare_propstream(new_rows)
+    for tracker in trackers.values():
+        if tracker.by is None or (not new_rows.empty and tracker.by in new_rows.columns):
+            tracker.update(new_rows)
+
+    key = st.selectbox("Rank by", RANK_KEYS, format_func=lambda k: {"equity_pct": "equity %"}.get(k, k))
+    by = st.selectbox("Top 50 within", [None, "zip", "category"], format_func=lambda b: b or "all leads")
+    tracker = trackers[by]
+    if by is None:
+        top = tracker.get(key)
+    else:
+        groups = sorted(tracker.get(key)[by].dropna().astype(str).unique()) if not tracker.get(key).empty else []
+        group = st.selectbox(by.title(), groups) if groups else None
+        top = tracker.get(key, group) if group is not None else pd.DataFrame()
+    if top.empty:
+        st.info("No ranked leads yet.")
+    else:
+        cols = [c for c in ["id","date_posted","title","zip","category","price","arv","equity","equity_pct","score"] if c in top.columns]
+        st.dataframe(top[cols], use_container_width=True, height=600)
+
+# ---------------------------------
+# Downloads (demo nav)
+# ---------------------------------
+if demo_page == "Downloads":
+    st.header("📦 Downloads")
+    table = st.selectbox("Table", ["propstream_leads", "craigslist_leads"])
+    sample = supabase.table(table).select("*").limit(1).execute().data or []
+    all_cols = list(sample[0].keys()) if sample else []
+    cols = st.multiselect("Columns", all_cols, default=all_cols)
+    fmt = st.radio("Format", list(export.WRITERS), horizontal=True)
+    min_arv = st.number_input("Minimum ARV", min_value=0.0, value=0.0, step=10000.0)
+    hot_only = st.checkbox("Hot leads only")
+    filters = []
+    if min_arv > 0:
+        filters.append(("arv", "gte", min_arv))
+    if hot_only:
+        filters.append(("hot_lead", "eq", True))
+    if st.button("Build export"):
+        old = st.session_state.pop("export_path", None)
+        if old and os.path.exists(old):
+            os.remove(old)
+        with st.spinner(f"Exporting {table}…"):
+            chunks = export.iter_table(supabase, table, columns=cols, filters=filters)
+            path, rows = export.export_file(chunks, fmt)
+        st.session_state["export_path"] = path
+        st.session_state["export_name"] = f"{table}.{fmt}"
+        st.success(f"Exported {rows:,} rows.")
+    path = st.session_state.get("export_path")
+    if path and os.path.exists(path):
+        name = st.session_state["export_name"]
+        with open(path, "rb") as f:
+            st.download_button(
+                f"📥 Download {name}",
+                data=f,
+                file_name=name,
+                mime=export.MIME_TYPES[name.rsplit(".", 1)[1]],
+            )
+
 # ---------------------------------
 # Main Sidebar Navigation
 # ---------------------------------
@@ -247,21 +370,22 @@ if page == "Live Leads":
         st.warning("No leads found.")
         st.stop()
     df["Hot"] = df.get("hot_lead", False).map({True: "🔥", False: ""})
-    df["Map"] = df.apply(
-        lambda r: f"https://www.google.com/maps?q={r.latitude},{r.longitude}" if pd.notna(r.latitude) else None,
-        axis=1,
-    )
-    df["Street View"] = df.get("street_view_url", "")
+    df["Map"], street_view = map_urls(df)
+    df["Street View"] = df["street_view_url"].fillna(street_view) if "street_view_url" in df else street_view
     df["Link"] = df.get("link", "").map(lambda u: f"[View Post]({u})" if u else "")
+    df = search_leads(df, "craigslist", "link")
     to_delete = st.multiselect("Delete Craigslist IDs:", df["id"].tolist())
     if st.button("🗑️ Delete Selected") and to_delete:
         supabase.table("craigslist_leads").delete().in_("id", to_delete).execute()
+        frame_cache.invalidate("craigslist_leads")
         st.success("Deleted selected.")
     if st.button("🗑️ Delete All"):
         supabase.table("craigslist_leads").delete().neq("id", "").execute()
+        frame_cache.invalidate("craigslist_leads")
         st.success("Cleared all.")
+    cols = ["id","date_posted","title","price","arv","score","motivation","Hot","Map","Street View","Link"]
     st.dataframe(
-        df[["id","date_posted","title","price","arv","score","motivation","Hot","Map","Street View","Link"]],
+        df[cols + (["Match"] if "Match" in df else [])],
         use_container_width=True, height=600
     )
 
@@ -278,17 +402,18 @@ elif page == "PropStream Leads":
     sel = st.multiselect("Delete PropStream IDs:", df["id"].tolist())
     if st.button("🗑️ Delete Selected") and sel:
         supabase.table("propstream_leads").delete().in_("id", sel).execute()
+        frame_cache.invalidate("propstream_leads")
         st.success("Deleted selected.")
     if st.button("🧹 Delete All"):
         supabase.table("propstream_leads").delete().neq("id","").execute()
+        frame_cache.invalidate("propstream_leads")
         st.success("Cleared all.")
-    df["Map"] = df.apply(
-        lambda r: f"https://www.google.com/maps?q={r.latitude},{r.longitude}" if pd.notna(r.latitude) else None,
-        axis=1,
-    )
-    df["Street View"] = df.get("street_view_url","")
+    df["Map"], street_view = map_urls(df)
+    df["Street View"] = df["street_view_url"].fillna(street_view) if "street_view_url" in df else street_view
+    df = search_leads(df, "propstream", "id")
+    cols = ["id","date_posted","title","price","arv","category","score","motivation","Hot","Map","Street View"]
     st.dataframe(
-        df[["id","date_posted","title","price","arv","category","score","motivation","Hot","Map","Street View"]],
+        df[cols + (["Match"] if "Match" in df else [])],
         use_container_width=True, height=600
     )
 
@@ -310,11 +435,8 @@ elif page == "Leads Dashboard":
     for col in ["price","arv","equity"]:
         combined[col] = pd.to_numeric(combined.get(col,0), errors="coerce").fillna(0)
     combined["equity"] = combined["arv"] - combined["price"]
-    combined["hot_lead"] = (
-        (combined["equity"]/combined["arv"] >= 0.25) &
-        (combined["arv"] >= 100000) &
-        (combined["equity"] >= 30000)
-    )
+    combined["hot_lead"] = RULES.mask(combined, "hot_lead")
+    chosen = []
     if "category" in combined.columns:
         cats = sorted(combined[combined["source"]=="PropStream"]["category"].dropna().unique())
         chosen = st.multiselect("Filter PropStream categories:", cats, default=cats)
@@ -325,11 +447,13 @@ elif page == "Leads Dashboard":
     c3.metric("Avg ARV", f"${combined['arv'].mean():,.0f}")
     c4.metric("Hot Leads", int(combined['hot_lead'].sum()))
     if st.checkbox("Show Price over Time"):
-        chart = alt.Chart(combined).mark_line(point=True).encode(
-            x="date_posted:T", y="price:Q", color="source:N",
-            tooltip=["source","title","price","arv","equity"]
-        ).properties(width=800)
-        st.altair_chart(chart)
+        mode = st.radio("Chart", list(CHART_MODES), format_func=CHART_MODES.get, horizontal=True)
+        version = (
+            frame_cache.frame_version("craigslist_leads") if show_cr else None,
+            frame_cache.frame_version("propstream_leads") if show_ps else None,
+        )
+        series = price_series(combined, version, (show_cr, show_ps, tuple(chosen)), mode)
+        st.altair_chart(price_chart(series, mode).properties(width=800))
     if {"latitude","longitude"}.issubset(combined.columns):
         dfm = combined.dropna(subset=["latitude","longitude"])
         view = pdk.ViewState(latitude=dfm.latitude.mean(), longitude=dfm.longitude.mean(), zoom=11)
@@ -345,44 +469,98 @@ elif page == "Leads Dashboard":
 elif page == "Upload Leads":
     st.header("📤 Upload, Qualify & Enrich All 1 000 Leads")
 
-    # 1) Upload CSV
-    file = st.file_uploader("Choose your PropStream CSV", type=["csv"])
-    if not file:
+    jobs = _job_queue()
+
+    # 1) Upload CSV → background enrichment job
+    files = st.file_uploader(
+        "Choose your PropStream / county exports", type=["csv", "xlsx"], accept_multiple_files=True
+    )
+    b1, b2 = st.columns(2)
+    max_requests = b1.number_input("Max Redfin lookups (0 = no limit)", min_value=0, value=0, step=50)
+    max_seconds = b2.number_input("Time budget in seconds (0 = no limit)", min_value=0, value=0, step=30)
+    if files and st.button("🚀 Start Enrichment"):
+        # parse every file in parallel, each with its detected column layout
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for i, f in enumerate(files):
+                # one folder per upload: same-named files don't overwrite each
+                # other, and reports still show the original file name
+                os.makedirs(os.path.join(tmp, str(i)))
+                paths.append(os.path.join(tmp, str(i), os.path.basename(f.name)))
+                with open(paths[-1], "wb") as out:
+                    out.write(f.getbuffer())
+            imported, report = importer.import_files(paths)
+        for entry in report:
+            if entry["error"]:
+                st.warning(f"Skipped {entry['file']}: {entry['error']}")
+            elif entry["new_layout"]:
+                st.info(f"New column layout in {entry['file']}: {entry['columns']}")
+        if imported.empty:
+            st.error("No leads found in the uploaded files."); st.stop()
+        df = enrichment.prepare_upload(imported)
+        params = {"max_requests": int(max_requests), "max_seconds": int(max_seconds)}
+        st.query_params["job"] = jobs.submit("enrich", df, params)
+
+    # the job id lives in the URL so a refresh lands back on the same job
+    recent = {j["id"]: j for j in jobs.recent()}
+    job_id = st.query_params.get("job")
+    if recent:
+        ids = list(recent)
+        job_id = st.selectbox(
+            "Enrichment job", ids,
+            index=ids.index(job_id) if job_id in recent else 0,
+            format_func=lambda i: f"{recent[i]['created_at'][:16]} · {recent[i]['total']:,} leads · {recent[i]['status']}",
+        )
+        st.query_params["job"] = job_id
+    if not job_id:
         st.info("Upload your PropStream export first.")
         st.stop()
 
-    df = pd.read_csv(file)
-    # rename & basic equity calculation
-    df.rename(columns={
-        "Property Address": "address",
-        "City":              "city",
-        "State":             "state",
-        "Zip Code":          "zip",
-        "Amount Owed":       "owed",
-        "Estimated Value":   "est_value"
-    }, inplace=True)
-    df["owed"]      = pd.to_numeric(df["owed"], errors="coerce").fillna(0)
-    df["est_value"] = pd.to_numeric(df["est_value"], errors="coerce").fillna(0)
-
-    # 2) ARV fallback helper
-    def get_arv(r):
-        arv = estimate_redfin_arv(r["address"], r["city"], r["state"], r["zip"])
-        return arv if arv is not None else r["est_value"] * 0.7
-
-    # 3) Enrich all rows
-    st.info("Enriching 1 000 leads (Redfin + 70% fallback)…")
-    df["Redfin_ARV"]    = df.apply(get_arv, axis=1)
-    df["Redfin_Equity"] = df["Redfin_ARV"] - df["owed"]
-    df["Redfin_Equity%"] = (df["Redfin_Equity"] / df["Redfin_ARV"]) * 100
-
-    # 4) Qualify by ARV ≥ $100 000 & Equity% ≥ 30%
-    qualified = df[
-        (df["Redfin_ARV"] >= 100_000) &
-        (df["Redfin_Equity%"] >= 30)
-    ].copy()
-    qualified.sort_values("Redfin_Equity%", ascending=False, inplace=True)
+    # 2) Poll progress in a fragment so reruns never wait on Redfin;
+    #    best-equity rows are looked up first, so confirmed deals show up early
+    @st.fragment(run_every=2)
+    def _job_progress(job_id):
+        info = jobs.status(job_id)
+        if info is None:
+            st.rerun()
+        st.progress(
+            info["done"] / max(info["total"], 1),
+            text=f"Enriching best leads first (Redfin + local ARV model fallback)… {info['done']:,} / {info['total']:,}",
+        )
+        live = enrichment.confirmed(jobs.results(job_id))
+        st.markdown(f"#### {len(live)} qualified so far")
+        st.dataframe(
+            live[["address","city","zip","owed","Redfin_ARV","Redfin_Equity","Redfin_Equity%"]].head(50),
+            height=300, use_container_width=True,
+        )
+        if info["status"] not in ("queued", "running"):
+            st.rerun()
+
+    info = jobs.status(job_id)
+    if info is None:
+        # e.g. a shared link, or jobs.sqlite was wiped by a dyno restart
+        del st.query_params["job"]
+        st.warning(f"Enrichment job {job_id} no longer exists — upload the file again.")
+        st.stop()
+    if info["status"] in ("queued", "running"):
+        _job_progress(job_id)
+        st.stop()
+    if info["status"] == "failed":
+        st.error(f"Enrichment failed: {info['error']}")
+        st.stop()
+
+    # 3) Fill Redfin misses & qualify by ARV ≥ $100 000 & Equity% ≥ 30%
+    results = jobs.results(job_id)
+    qualified = enrichment.qualify(enrichment.finalize(results, supabase))
 
     st.markdown(f"### {len(qualified)} Qualified & Enriched Leads")
+    if "skipped" in results:
+        looked_up = int(results["enrich_status"].notna().sum()) if "enrich_status" in results else 0
+        pruned = int((~enrichment.viable(results)).sum())
+        st.caption(
+            f"{looked_up:,} Redfin lookups · {pruned:,} pruned (can't qualify) · "
+            f"{int(results['skipped'].notna().sum()) - pruned:,} left to the ARV model by the budget"
+        )
     st.dataframe(
         qualified[[
             "address","city","zip","owed",
@@ -392,14 +570,16 @@ elif page == "Upload Leads":
         use_container_width=True
     )
 
-    # 5) Download CSV of the full qualified set
-    csv = qualified.to_csv(index=False).encode()
-    st.download_button(
-        "📥 Download Qualified & Enriched Leads",
-        data=csv,
-        file_name="qualified_enriched_leads.csv",
-        mime="text/csv"
-    )
+    # 5) Download CSV of the full qualified set (streamed to a temp file)
+    path, _ = export.export_file(export.iter_chunks(qualified), "csv")
+    with open(path, "rb") as f:
+        st.download_button(
+            "📥 Download Qualified & Enriched Leads",
+            data=f,
+            file_name="qualified_enriched_leads.csv",
+            mime="text/csv"
+        )
+    os.remove(path)
     
 # ---------------------------------
 # Deal Tools & Assignment Contract
@@ -407,11 +587,77 @@ elif page == "Upload Leads":
 elif page == "Deal Tools":
     st.header("🧮 Deal Tools & Contracts")
     st.subheader("🔢 Offer Calculator (MAO)")
-    arv_val = st.number_input("ARV", min_value=0.0, value=150000.0)
-    repairs_val = st.number_input("Repair Costs", min_value=0.0, value=30000.0)
-    offer_pct = st.slider("Offer % of ARV", 0.0, 1.0, 0.7)
-    mao = (arv_val * offer_pct) - repairs_val
-    st.metric("MAO", f"${mao:,.2f}")
+    calc_mode = st.radio("Mode", ["Single deal", "Portfolio"], horizontal=True)
+    if calc_mode == "Single deal":
+        arv_val = st.number_input("ARV", min_value=0.0, value=150000.0)
+        repairs_val = st.number_input("Repair Costs", min_value=0.0, value=30000.0)
+        offer_pct = st.slider("Offer % of ARV", 0.0, 1.0, 0.7)
+        mao = (arv_val * offer_pct) - repairs_val
+        st.metric("MAO", f"${mao:,.2f}")
+    else:
+        lead_set = st.selectbox("Leads", ["PropStream leads", "Latest enrichment job (qualified)"])
+        if lead_set == "PropStream leads":
+            leads, arv_col, price_col = get_propstream_data(), "arv", "price"
+        else:
+            done = [j for j in _job_queue().recent() if j["status"] == "done"]
+            leads = enrichment.qualify(enrichment.finalize(_job_queue().results(done[0]["id"]), supabase)) if done else pd.DataFrame()
+            arv_col, price_col = "Redfin_ARV", "owed"
+        leads = leads[pd.to_numeric(leads[arv_col], errors="coerce") > 0] if arv_col in leads else pd.DataFrame()
+        if leads.empty:
+            st.info("No leads with an ARV to evaluate.")
+        else:
+            lo, hi = st.slider("Offer % of ARV range", 0.5, 0.9, (0.60, 0.80), step=0.01)
+            step = st.select_slider("Offer % step", [0.01, 0.02, 0.05], value=0.02)
+            pcts = np.round(np.arange(lo, hi + step / 2, step), 2)
+            repairs_pct = st.radio("Repair scenarios as", ["% of ARV", "Flat $"], horizontal=True) == "% of ARV"
+            repairs_text = st.text_input(
+                "Repair scenarios (comma-separated)",
+                value="5, 10, 15, 20, 25" if repairs_pct else "15000, 30000, 45000, 60000",
+            )
+            try:
+                repairs = np.array([float(x) for x in repairs_text.split(",") if x.strip()])
+            except ValueError:
+                st.error("Repair scenarios must be numbers."); st.stop()
+            if not len(repairs):
+                st.error("Enter at least one repair scenario."); st.stop()
+            repairs = repairs / 100 if repairs_pct else repairs
+            target = st.number_input("Target spread ($)", min_value=0.0, value=float(deals.TARGET_SPREAD), step=1000.0)
+
+            arv = pd.to_numeric(leads[arv_col], errors="coerce").to_numpy(dtype=float)
+            price = pd.to_numeric(leads[price_col], errors="coerce").fillna(0).to_numpy(dtype=float)
+            summary = deals.scenario_summary(arv, price, pcts, repairs, repairs_pct, target)
+            summary["repair scenario"] = (
+                (summary["repairs"] * 100).round(1).astype(str) + "% ARV" if repairs_pct
+                else "$" + summary["repairs"].map("{:,.0f}".format)
+            )
+            st.caption(f"{len(leads):,} leads × {len(pcts) * len(repairs)} scenarios")
+            heat = (
+                alt.Chart(summary)
+                   .mark_rect()
+                   .encode(
+                       x=alt.X("offer_pct:O", title="Offer % of ARV"),
+                       y=alt.Y("repair scenario:N", sort=None, title="Repairs"),
+                       color=alt.Color("deals:Q", title=f"Deals ≥ ${target:,.0f}"),
+                       tooltip=["offer_pct", "repair scenario", "deals",
+                                alt.Tooltip("total_fee:Q", format="$,.0f"),
+                                alt.Tooltip("avg_fee:Q", format="$,.0f"),
+                                alt.Tooltip("median_spread:Q", format="$,.0f")],
+                   )
+                   .properties(title="Deals clearing the target spread")
+            )
+            st.altair_chart(heat, use_container_width=True)
+
+            c1, c2 = st.columns(2)
+            pick_pct = c1.selectbox("Scenario offer %", pcts, index=len(pcts) // 2)
+            pick_rep = c2.selectbox("Scenario repairs", summary["repair scenario"].unique())
+            pick = summary[(summary["offer_pct"] == pick_pct) & (summary["repair scenario"] == pick_rep)].iloc[0]
+            k1, k2, k3 = st.columns(3)
+            k1.metric("Deals clearing target", f"{int(pick['deals']):,}")
+            k2.metric("Projected fees", f"${pick['total_fee']:,.0f}")
+            k3.metric("Avg fee", f"${pick['avg_fee']:,.0f}")
+            per_lead = deals.lead_deals(leads, arv_col, price_col, pick_pct, pick["repairs"], repairs_pct, target)
+            cols = [c for c in ["id","title","address","city","zip",arv_col,price_col,"MAO","Repairs","Spread","Assignment Fee"] if c in per_lead.columns]
+            st.dataframe(per_lead[cols].head(200), use_container_width=True, height=400)
     st.subheader("📄 Real Estate Assignment Contract")
     assignor = st.text_input("Assignor Name")
     assignor_addr = st.text_input("Assignor Address")
@@ -475,6 +721,7 @@ elif page == "Deal Tools":
                 .update({"status": new_status_option})\
                 .eq("id", lead_id_input)\
                 .execute()
+            frame_cache.invalidate("propstream_leads")
             st.success(f"Lead {lead_id_input} set to {new_status_option}.")
         except APIError as ex:
             st.error(f"Could not update status: {ex}")
@@ -489,5 +736,8 @@ else:
     st.header("Settings")
     st.markdown("""
         • Supabase tables: craigslist_leads, propstream_leads  
+        • Craigslist also stores `description` (post body, used by search)  
+        • PropStream `link` needs a unique constraint (uploads upsert on it)  
+        • ARV model: `arv_labels` (key unique, source, zip, price, sqft, beds, baths, recorded_at) and `arv_models` (version, trained_at, model jsonb); retrained daily by the "Train ARV model" workflow  
         • Required schema for PropStream: id, title, link, date_posted, price, arv, equity, hot_lead, category, address, city, state, zip, latitude, longitude
     """)
@@ -6,6 +6,8 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
+from utils.export import write_xlsx
+from utils.contacts import validate_contacts
 
 INPUT_FILE  = "Skip_Trace_Top_500.xlsx"
 OUTPUT_FILE = "Skip_Trace_Results.xlsx"
@@ -52,7 +54,13 @@ for idx, row in df.iterrows():
 
 driver.quit()
 
+# 4) validate contacts: E.164 phones, email syntax + MX (one lookup per domain)
+out_df = validate_contacts(pd.DataFrame(results))
+print(
+    f"📞 {out_df['phone_e164'].notna().sum()}/{len(out_df)} valid phones, "
+    f"📧 {(out_df['email_status'] == 'ok').sum()}/{len(out_df)} deliverable emails"
+)
+
 # 5) save to Excel
-out_df = pd.DataFrame(results)
-out_df.to_excel(OUTPUT_FILE, index=False)
+write_xlsx([out_df], OUTPUT_FILE)
 print(f"\n✅ Done—results in ./{OUTPUT_FILE}")
@@ -1,14 +1,23 @@
-import requests
 import pandas as pd
 from io import StringIO
 import urllib3
+from datetime import datetime
+from utils import history
+from utils import importer
+from utils import transport
+from utils.rules import RULES
 
 # Disable the HTTPS warnings since we're using HTTP
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# county layers refresh at most daily; reruns within this window reuse the download
+ARCGIS_TTL = 12 * 3600
+
 def fetch_csv(url):
-    # Now hitting HTTP, so cert warnings go away
-    resp = requests.get(url, verify=False)
+    # Now hitting HTTP, so cert warnings go away. ArcGIS reports query errors
+    # as a 200 with a JSON body, which must not be cached as the CSV.
+    resp = transport.get(url, verify=False, timeout=60, ttl=ARCGIS_TTL,
+                         cache_if=lambda r: not r.text.lstrip().startswith("{"))
     resp.raise_for_status()
     return pd.read_csv(StringIO(resp.text))
 
@@ -43,39 +52,37 @@ url3 = (
     "RecordingPostalCode,LienAmt,Est_Value&f=csv"
 )
 
-# Fetch each
-df1 = fetch_csv(url1).rename(columns={
-    "RecordingAddress":"Property Address",
-    "RecordingCity":"City",
-    "RecordingState":"State",
-    "RecordingPostalCode":"Zip Code",
-    "LienAmt":"Amount Owed",
-    "Est_Value":"Estimated Value"
-})
-df2 = fetch_csv(url2).rename(columns={
-    "SitusAddress":"Property Address",
-    "SitusCity":"City",
-    "SitusState":"State",
-    "SitusZip":"Zip Code",
-    "MortgageBalance":"Amount Owed",
-    "MarketValue":"Estimated Value"
-})
-df3 = fetch_csv(url3).rename(columns={
-    "RecordingAddress":"Property Address",
-    "RecordingCity":"City",
-    "RecordingState":"State",
-    "RecordingPostalCode":"Zip Code",
-    "LienAmt":"Amount Owed",
-    "Est_Value":"Estimated Value"
-})
+# Fetch each; column layouts are detected once per header fingerprint
+# (cached in import_mappings.json) instead of hand-written renames
+df1 = importer.standardize(fetch_csv(url1))
+df2 = importer.standardize(fetch_csv(url2))
+df3 = importer.standardize(fetch_csv(url3))
+
+df1["source"] = "notice_of_default"
+df2["source"] = "absentee_owner"
+df3["source"] = "struck_off"
 
 # Combine and flag hot leads
 master = pd.concat([df1, df2, df3], ignore_index=True)
 master["Amount Owed"]      = pd.to_numeric(master["Amount Owed"], errors="coerce")
 master["Estimated Value"]  = pd.to_numeric(master["Estimated Value"], errors="coerce")
 master["Equity"]           = master["Estimated Value"] - master["Amount Owed"]
-master["hot_lead"]         = master["Equity"] / master["Estimated Value"] >= 0.25
+master["hot_lead"]         = RULES.mask(master, "high_equity", aliases={
+    "equity": "Equity", "arv": "Estimated Value",
+})
 
 # Save to CSV
 master.to_csv("master_leads.csv", index=False)
 print(f"Built master_leads.csv with {len(master)} rows, {int(master.hot_lead.sum())} hot leads.")
+
+# Store this run (Parquet, partitioned by source/ZIP) and diff it against the last one
+run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+master = history.add_keys(master)
+prev_id = history.previous_run(before=run_id)
+previous = history.load_run(prev_id) if prev_id else None
+history.write_run(master, run_id)
+
+delta = history.diff_runs(previous, master)
+delta.to_csv("new_leads.csv", index=False)
+counts = delta["change"].value_counts().to_dict()
+print(f"Run {run_id} vs {prev_id or 'nothing'}: {len(delta)} changes {counts} → new_leads.csv")
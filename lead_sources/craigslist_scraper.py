@@ -1,4 +1,4 @@
-import requests
+from utils import transport
 from bs4 import BeautifulSoup
 from datetime import datetime
 from supabase import create_client, Client
@@ -18,7 +18,7 @@ HEADERS = {
 }
 
 def get_posts(category_url):
-    response = requests.get(BASE_URL + category_url, headers=HEADERS)
+    response = transport.get(BASE_URL + category_url, headers=HEADERS)
     soup = BeautifulSoup(response.text, "html.parser")
     posts = soup.find_all("li", class_="result-row")
     results = []
@@ -1,7 +1,7 @@
-import requests
+from utils import transport
 
 def fetch_facebook_leads():
     url = "https://api.facebook.com/marketplace/leads"  # Example, adjust to actual API
-    response = requests.get(url)
+    response = transport.get(url)
     data = response.json()
     return data["leads"]
@@ -1,4 +1,4 @@
-import requests
+from utils import transport
 from bs4 import BeautifulSoup
 
 def fetch_zillow_fsbo():
@@ -7,7 +7,7 @@ def fetch_zillow_fsbo():
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36"
     }
 
-    response = requests.get(url, headers=headers)
+    response = transport.get(url, headers=headers)
     soup = BeautifulSoup(response.text, 'html.parser')
     leads = []
 
@@ -0,0 +1,385 @@
+"""Concurrent-session load test for app.py.
+
+Drives every sidebar page with simulated sessions (Streamlit's AppTest)
+against an in-memory Supabase stand-in filled with synthetic leads, and
+reports:
+
+- cold vs warm Supabase calls / rows per page (is caching doing its job?)
+- per-page rerun latency percentiles with LOADTEST_SESSIONS sessions at once,
+  one process each (like server workers sharing the on-disk frame cache;
+  AppTest isn't safe to run concurrently inside one interpreter)
+- memory per session (tracemalloc, in its own pass so it doesn't skew timings)
+
+    LOADTEST_ROWS=50000 LOADTEST_SESSIONS=16 python loadtest.py
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+ROWS = int(os.getenv("LOADTEST_ROWS", "20000"))
+SESSIONS = int(os.getenv("LOADTEST_SESSIONS", "8"))
+ROUNDS = int(os.getenv("LOADTEST_ROUNDS", "3"))
+MEMORY_SESSIONS = int(os.getenv("LOADTEST_MEMORY_SESSIONS", "4"))
+TIMEOUT = float(os.getenv("LOADTEST_TIMEOUT", "120"))
+_THIS_SCRIPT = sys.modules[__name__]
+
+MAIN_NAV = "Navigate to:"
+DEMO_NAV = "Go to"
+# (page name, radio label, option, follow-up interaction or None)
+PAGES = [
+    ("Live Leads", MAIN_NAV, "Live Leads", None),
+    ("PropStream Leads", MAIN_NAV, "PropStream Leads", None),
+    ("Leads Dashboard", MAIN_NAV, "Leads Dashboard", None),
+    ("Leads Dashboard + chart", MAIN_NAV, "Leads Dashboard", ("checkbox", "Show Price over Time", True)),
+    ("Upload Leads", MAIN_NAV, "Upload Leads", None),
+    ("Deal Tools", MAIN_NAV, "Deal Tools", None),
+    ("Deal Tools portfolio", MAIN_NAV, "Deal Tools", ("radio", "Mode", "Portfolio")),
+    ("Settings", MAIN_NAV, "Settings", None),
+    ("Top 50 Leads", DEMO_NAV, "Top 50 Leads", None),
+    ("Downloads", DEMO_NAV, "Downloads", None),
+]
+WORDS = ["vacant", "divorce", "fire", "urgent", "probate", "foreclosure", "handyman", "special", "roof", "tenant"]
+CATEGORIES = ["Pre-Foreclosure", "Absentee Owner", "Vacant", "Tax Lien", "High Equity"]
+ZIPS = ["75208", "75217", "75228", "75211", "75216", "75227", "75241"]
+
+
+# ───── Synthetic tables ─────
+def synthetic_leads(n: int, source: str, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    arv = rng.lognormal(12.0, 0.45, n).round(-3)
+    price = (arv * rng.uniform(0.35, 1.05, n)).round(-3)
+    posted = pd.Timestamp.now(tz="UTC") - pd.to_timedelta(rng.integers(0, 180 * 86_400, n), unit="s")
+    words = np.array(WORDS)[rng.integers(0, len(WORDS), (n, 2))]
+    df = pd.DataFrame({
+        "id": [f"{source[:2]}-{i}" for i in range(n)],
+        "title": [f"{a.title()} {b} house, motivated seller" for a, b in words],
+        "link": [f"https://dallas.craigslist.org/reb/d/{source}-{i}.html" for i in range(n)],
+        "date_posted": posted.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "price": price,
+        "arv": arv,
+        "equity": arv - price,
+        "hot_lead": (arv - price) > 0.3 * arv,
+        "address": [f"{n_} Main St" for n_ in rng.integers(100, 9999, n)],
+        "city": "Dallas",
+        "state": "TX",
+        "zip": np.array(ZIPS)[rng.integers(0, len(ZIPS), n)],
+        "latitude": 32.78 + rng.normal(0, 0.05, n),
+        "longitude": -96.80 + rng.normal(0, 0.05, n),
+        "street_view_url": None,
+    })
+    if source == "propstream":
+        df["category"] = np.array(CATEGORIES)[rng.integers(0, len(CATEGORIES), n)]
+        df["status"] = "New"
+    return df
+
+
+# ───── In-memory Supabase stand-in ─────
+class _Response:
+    def __init__(self, data, count=None):
+        self.data, self.count = data, count
+
+
+class _Query:
+    _ops = {
+        "eq": lambda s, v: s == v,
+        "neq": lambda s, v: s != v,
+        "gt": lambda s, v: s > v,
+        "gte": lambda s, v: s >= v,
+        "lt": lambda s, v: s < v,
+        "lte": lambda s, v: s <= v,
+        "in_": lambda s, v: s.isin(list(v)),
+        "ilike": lambda s, v: s.astype(str).str.fullmatch(v.replace("%", ".*"), case=False),
+        "is_": lambda s, v: s.isna() if v == "null" else s.notna(),
+    }
+
+    def __init__(self, client, table):
+        self.client, self.table = client, table
+        self.columns, self.count, self.action, self.payload = "*", None, "select", None
+        self.filters, self.order_by, self.bounds = [], None, None
+
+    def __getattr__(self, name):
+        if name not in self._ops:
+            raise AttributeError(name)
+        def add(col, val):
+            self.filters.append((col, name, val))
+            return self
+        return add
+
+    def select(self, columns="*", count=None):
+        self.columns, self.count = columns, count
+        return self
+
+    def order(self, col, desc=False):
+        self.order_by = (col, desc)
+        return self
+
+    def limit(self, n):
+        self.bounds = (0, n - 1)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def update(self, values):
+        self.action, self.payload = "update", values
+        return self
+
+    def insert(self, rows, **kwargs):
+        self.action, self.payload = "insert", rows
+        return self
+
+    upsert = insert
+
+    def execute(self):
+        return self.client._execute(self)
+
+
+class FakeSupabase:
+    """Just enough of the supabase-py query builder for app.py, counting calls."""
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.lock = threading.Lock()
+        self.calls = Counter()   # (table, kind) -> calls
+        self.rows = Counter()    # table -> rows returned
+
+    def table(self, name):
+        return _Query(self, name)
+
+    def snapshot(self):
+        with self.lock:
+            return Counter(self.calls), Counter(self.rows)
+
+    def _execute(self, q):
+        with self.lock:
+            df = self.tables[q.table]
+            mask = np.ones(len(df), dtype=bool)
+            for col, op, val in q.filters:
+                mask &= q._ops[op](df[col], val).to_numpy(dtype=bool, na_value=False)
+
+            if q.action == "delete":
+                self.tables[q.table] = df[~mask].reset_index(drop=True)
+                self.calls[(q.table, "write")] += 1
+                return _Response([])
+            if q.action == "update":
+                for col, val in q.payload.items():
+                    df.loc[mask, col] = val
+                self.calls[(q.table, "write")] += 1
+                return _Response([])
+            if q.action == "insert":
+                rows = q.payload if isinstance(q.payload, list) else [q.payload]
+                self.tables[q.table] = pd.concat([df, pd.DataFrame(rows)], ignore_index=True)
+                self.calls[(q.table, "write")] += 1
+                return _Response(rows)
+
+            out = df[mask]
+            if q.order_by:
+                out = out.sort_values(q.order_by[0], ascending=not q.order_by[1])
+            total = len(out)
+            if q.bounds:
+                out = out.iloc[q.bounds[0]:q.bounds[1] + 1]
+            if q.columns != "*":
+                out = out[[c.strip() for c in q.columns.split(",")]]
+            # full-table reads are what the frame cache is supposed to absorb
+            kind = "full read" if not q.filters and not q.bounds and q.columns == "*" else "query"
+            self.calls[(q.table, kind)] += 1
+            self.rows[q.table] += len(out)
+            data = out.astype(object).where(out.notna(), None).to_dict("records")
+        return _Response(data, count=total if q.count else None)
+
+
+def install_fake_supabase(client: FakeSupabase):
+    module = types.ModuleType("supabase")
+    module.create_client = lambda url, key: client
+    module.Client = FakeSupabase
+    sys.modules["supabase"] = module
+
+
+def fake_client() -> FakeSupabase:
+    """The same synthetic tables in every process (fixed seeds)."""
+    return FakeSupabase({
+        "craigslist_leads": synthetic_leads(ROWS, "craigslist", seed=1).drop(columns=["street_view_url"]),
+        "propstream_leads": synthetic_leads(ROWS, "propstream", seed=2),
+    })
+
+
+# ───── Sessions ─────
+def new_session():
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file("app.py", default_timeout=TIMEOUT)
+    at.run()
+    return at
+
+
+def _widget(at, kind, label):
+    for w in getattr(at, kind):
+        if w.label == label:
+            return w
+    raise LookupError(f"No {kind} labelled {label!r}")
+
+
+def visit(at, page):
+    """Navigate one session to `page`; returns seconds spent in reruns."""
+    _, nav, option, action = page
+    # park the other radio on its cheapest option so we time one page at a time
+    other = (DEMO_NAV, "Upload CSV") if nav == MAIN_NAV else (MAIN_NAV, "Settings")
+    _widget(at, "radio", other[0]).set_value(other[1])
+    start = time.perf_counter()
+    _widget(at, "radio", nav).set_value(option)
+    at.run()
+    if action:
+        kind, label, value = action
+        _widget(at, kind, label).set_value(value)
+        at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{page[0]}: {at.exception[0].message}")
+    return elapsed
+
+
+def cache_pass(client):
+    """One session, each page twice: what a cold vs a warm rerun costs in Supabase traffic."""
+    calls0, rows0 = client.snapshot()
+    start = time.perf_counter()
+    at = new_session()
+    calls1, rows1 = client.snapshot()
+    # the first run lands on the default page and builds the shared caches
+    report = [{
+        "page": "(session start)", "cold s": time.perf_counter() - start,
+        "cold calls": sum((calls1 - calls0).values()), "cold rows": sum((rows1 - rows0).values()),
+    }]
+    for page in PAGES:
+        row = {"page": page[0]}
+        for phase in ["cold", "warm"]:
+            calls0, rows0 = client.snapshot()
+            row[f"{phase} s"] = visit(at, page)
+            calls1, rows1 = client.snapshot()
+            row[f"{phase} calls"] = sum((calls1 - calls0).values())
+            row[f"{phase} rows"] = sum((rows1 - rows0).values())
+        report.append(row)
+    report = pd.DataFrame(report)
+    counts = [c for c in report.columns if c.endswith(("calls", "rows"))]
+    return report.astype({c: "Int64" for c in counts})
+
+
+def _user(seed: int, rounds: int):
+    """One simulated user in its own process: (timings per page, Supabase calls)."""
+    client = fake_client()
+    install_fake_supabase(client)
+    timings = defaultdict(list)
+    at = new_session()
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        for page in rng.sample(PAGES, len(PAGES)):
+            timings[page[0]].append(visit(at, page))
+    return dict(timings), client.snapshot()[0]
+
+
+def latency_pass(sessions: int, rounds: int):
+    """`sessions` concurrent users, each visiting every page `rounds` times in
+    random order; returns (latency table, Supabase calls over all sessions)."""
+    timings, calls = defaultdict(list), Counter()
+    # AppTest leaves app.py installed as __main__, and spawn re-runs __main__
+    # in every child; point it back at this script while the pool starts
+    app_main, sys.modules["__main__"] = sys.modules["__main__"], _THIS_SCRIPT
+    try:
+        with ProcessPoolExecutor(max_workers=sessions, mp_context=multiprocessing.get_context("spawn")) as pool:
+            for fut in [pool.submit(_user, s, rounds) for s in range(sessions)]:
+                user_timings, user_calls = fut.result()
+                for name, ts in user_timings.items():
+                    timings[name] += ts
+                calls += user_calls
+    finally:
+        sys.modules["__main__"] = app_main
+
+    return pd.DataFrame([
+        {
+            "page": name,
+            "reruns": len(ts),
+            "p50 ms": np.percentile(ts, 50) * 1000,
+            "p90 ms": np.percentile(ts, 90) * 1000,
+            "p99 ms": np.percentile(ts, 99) * 1000,
+            "max ms": max(ts) * 1000,
+        }
+        for name, ts in timings.items()
+    ]).sort_values("p90 ms", ascending=False), calls
+
+
+def memory_pass(sessions: int):
+    """Traced bytes each extra live session adds once shared caches are warm."""
+    tracemalloc.start()
+    warm = new_session()
+    for page in PAGES:
+        visit(warm, page)
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    alive = []
+    for _ in range(sessions):
+        at = new_session()
+        for page in PAGES:
+            visit(at, page)
+        alive.append(at)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "shared MB": base / 2**20,
+        "per session MB": (current - base) / sessions / 2**20,
+        "peak MB": peak / 2**20,
+    }
+
+
+def main():
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    # every on-disk cache the app touches goes to a throwaway directory
+    scratch = tempfile.mkdtemp(prefix="loadtest-")
+    os.environ.update({
+        "FRAME_CACHE_DIR": os.path.join(scratch, "frames"),
+        "SEARCH_DB": os.path.join(scratch, "search.sqlite"),
+        "JOBS_DB": os.path.join(scratch, "jobs.sqlite"),
+        "GEOCODE_CACHE": os.path.join(scratch, "geocode.sqlite"),
+        "HTTP_MODE": "replay",
+        "HTTP_CACHE_DIR": os.path.join(scratch, "http"),
+    })
+
+    client = fake_client()
+    install_fake_supabase(client)
+    print(f"🏗️ {ROWS:,} synthetic rows per table, {SESSIONS} sessions × {ROUNDS} rounds × {len(PAGES)} pages")
+
+    pd.set_option("display.width", 200)
+    print("\n🧊 Cold vs warm rerun (one session)")
+    print(cache_pass(client).round(3).to_string(index=False, na_rep=""))
+
+    started = time.perf_counter()
+    latency, calls = latency_pass(SESSIONS, ROUNDS)
+    wall = time.perf_counter() - started
+    print(f"\n⏱️ Rerun latency with {SESSIONS} concurrent sessions ({wall:.1f}s wall)")
+    print(latency.round(1).to_string(index=False))
+    reruns = latency["reruns"].sum()
+    print(f"Supabase calls: {sum(calls.values()):,} for {reruns:,} page visits "
+          f"({sum(calls.values()) / reruns:.2f} per visit)")
+    for (table, kind), n in sorted(calls.items()):
+        print(f"  {table:<18} {kind:<10} {n:,}")
+
+    print(f"\n🧠 Memory ({MEMORY_SESSIONS} extra sessions, tracemalloc)")
+    for name, mb in memory_pass(MEMORY_SESSIONS).items():
+        print(f"  {name:<15} {mb:,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
 import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
 import streamlit as st
 import pandas as pd
 import altair as alt
 import pydeck as pdk
+from supabase import create_client
 from scraper import fetch_and_store
+from utils import timeseries
+
+# Scrapes only change the data when they finish; once the last refresh for a
+# region is older than this, the next page view kicks off another one.
+STALE_AFTER_MIN = 30
 
 # ─── Page config must be first Streamlit call ────────────────────────────────
 st.set_page_config(
@@ -37,15 +47,110 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# ─── Data caching & coercion ───────────────────────────────────────────────────
+# ─── Stored-table reads & background refresh ──────────────────────────────────
+@st.cache_resource
+def get_supabase():
+    return create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+
+@st.cache_resource
+def refresh_state():
+    """Process-wide: one lock per region, a generation counter bumped after
+    each finished scrape (part of get_data's cache key), when each region's
+    last refresh finished, and last errors."""
+    return {
+        "guard": threading.Lock(),
+        "locks": defaultdict(threading.Lock),
+        "generation": defaultdict(int),
+        "last_refreshed_at": {},
+        "errors": {},
+    }
+
+def _region_lock(region: str) -> threading.Lock:
+    state = refresh_state()
+    with state["guard"]:
+        return state["locks"][region]
+
+def start_refresh(region: str) -> bool:
+    """Single-flight background scrape; False if one is already running."""
+    state = refresh_state()
+    lock = _region_lock(region)
+    if not lock.acquire(blocking=False):
+        return False
+
+    def run():
+        try:
+            fetch_and_store(region=region)
+            state["errors"].pop(region, None)
+        except Exception as e:
+            state["errors"][region] = str(e)
+        finally:
+            state["last_refreshed_at"][region] = time.time()
+            state["generation"][region] += 1
+            lock.release()
+
+    threading.Thread(target=run, name=f"refresh-{region}", daemon=True).start()
+    return True
+
+def is_refreshing(region: str) -> bool:
+    return _region_lock(region).locked()
+
 @st.cache_data(ttl=300, show_spinner=False)
-def get_data(region: str) -> pd.DataFrame:
-    raw = fetch_and_store(region=region)
-    df = pd.DataFrame(raw)
+def get_data(region: str, generation: int) -> pd.DataFrame:
+    """Leads for `region` from the stored table; never scrapes."""
+    resp = (
+        get_supabase().table("craigslist_leads").select("*")
+        .ilike("link", f"%//{region}.craigslist.org%")
+        .order("date_posted", desc=True)
+        .execute()
+    )
+    df = pd.DataFrame(resp.data or [])
     if "price" in df.columns:
         df["price"] = pd.to_numeric(df["price"], errors="coerce")
     return df
 
+def load_region(region: str) -> pd.DataFrame:
+    state = refresh_state()
+    df = get_data(region, state["generation"][region])
+    # cooldown from the last refresh, not the newest row: a quiet (or empty)
+    # region would otherwise look stale again right after every scrape
+    last = state["last_refreshed_at"].get(region)
+    if last is None or time.time() - last > STALE_AFTER_MIN * 60:
+        start_refresh(region)
+    return df
+
+def data_age(df: pd.DataFrame):
+    col = next((c for c in ["fetched_at", "date_posted"] if c in df.columns), None)
+    if col is None:
+        return None
+    newest = pd.to_datetime(df[col], errors="coerce", utc=True).max()
+    return None if pd.isna(newest) else datetime.now(timezone.utc) - newest.to_pydatetime()
+
+def show_data_age(region: str, df: pd.DataFrame):
+    age = data_age(df)
+    label = "no data yet" if age is None else f"updated {int(age.total_seconds() // 60)} min ago"
+    if is_refreshing(region):
+        label += " · 🔄 refreshing in background…"
+    if region in refresh_state()["errors"]:
+        label += f" · ⚠️ last refresh failed: {refresh_state()['errors'][region]}"
+    st.caption(f"🕒 {region.title()} leads {label}")
+
+@st.fragment(run_every=3)
+def watch_refresh(region: str, generation: int):
+    """Rerun the page once the background scrape for `region` lands."""
+    if refresh_state()["generation"][region] != generation:
+        st.rerun()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def price_series(_df: pd.DataFrame, region: str, generation: int, fingerprint, start, end, mode: str) -> pd.DataFrame:
+    """Bounded chart data, cached per region data version and date filter.
+
+    `fingerprint` tracks the loaded frame itself: get_data re-reads every
+    5 minutes and picks up rows the scheduled scraper wrote, which don't
+    bump `generation`."""
+    if mode == "LTTB":
+        return timeseries.downsample(_df, "date_posted", "price")[["title", "price", "date_posted"]]
+    return timeseries.resample(_df, "date_posted", "price", freq=mode)
+
 region = os.getenv("CRAIGS_REGION", "dallas")
 
 # ─── Sidebar navigation ───────────────────────────────────────────────────────
@@ -55,26 +160,28 @@ page = st.sidebar.radio("", ["Leads", "Dashboard", "Settings"])
 # ─── Leads page ───────────────────────────────────────────────────────────────
 if page == "Leads":
     st.header("🔎 Latest Craigslist Listings")
-    df = get_data(region)
+    df = load_region(region)
+    show_data_age(region, df)
+
+    if st.button("🔄 Refresh now"):
+        if start_refresh(region):
+            st.success("Refresh started — new leads will appear when it finishes.")
+        else:
+            st.info("A refresh for this region is already running.")
 
     if df.empty:
-        st.info("No leads found yet. Click **Refresh** below.")
+        st.info("No leads found yet. Click **Refresh** above.")
     else:
         st.dataframe(df)
 
-    if st.button("🔄 Refresh now"):
-        st.cache_data.clear()
-        df = get_data(region)
-        if df.empty:
-            st.warning("Still no leads.")
-        else:
-            st.success(f"Fetched {len(df)} leads.")
-            st.dataframe(df)
+    if is_refreshing(region):
+        watch_refresh(region, refresh_state()["generation"][region])
 
 # ─── Dashboard page ──────────────────────────────────────────────────────────
 elif page == "Dashboard":
     st.header("📊 Analytics Dashboard")
-    df = get_data(region)
+    df = load_region(region)
+    show_data_age(region, df)
 
     if df.empty:
         st.info("No data to chart.")
@@ -118,18 +225,33 @@ elif page == "Dashboard":
     )
     df_filtered = df.loc[mask]
 
-    # Plot chart
-    chart = (
-        alt.Chart(df_filtered)
-           .mark_line(point=True)
-           .encode(
-               x=alt.X("date_posted:T", title="Date Posted"),
-               y=alt.Y("price:Q", title="Price (USD)"),
-               tooltip=["title", "price", "date_posted"],
-           )
-           .properties(height=350, width=800)
+    # Plot chart (bucketed or LTTB-sampled so the spec stays small)
+    mode = st.radio(
+        "Chart", ["W", "D", "LTTB"], horizontal=True,
+        format_func={"W": "Weekly range", "D": "Daily range", "LTTB": "Sampled points"}.get,
     )
-    st.altair_chart(chart, use_container_width=True)
+    generation = refresh_state()["generation"][region]
+    fingerprint = (len(df), str(df["date_posted"].max()))
+    series = price_series(df_filtered, region, generation, fingerprint, start_date, end_date, mode)
+    if mode == "LTTB":
+        chart = (
+            alt.Chart(series)
+               .mark_line(point=True)
+               .encode(
+                   x=alt.X("date_posted:T", title="Date Posted"),
+                   y=alt.Y("price:Q", title="Price (USD)"),
+                   tooltip=["title", "price", "date_posted"],
+               )
+        )
+    else:
+        base = alt.Chart(series).encode(x=alt.X("bucket:T", title="Date Posted"))
+        chart = (
+            base.mark_area(opacity=0.2).encode(y=alt.Y("min:Q", title="Price (USD)"), y2="max:Q")
+            + base.mark_line(point=True).encode(
+                y="median:Q", tooltip=["bucket:T", "min", "median", "max", "count"]
+            )
+        )
+    st.altair_chart(chart.properties(height=350, width=800), use_container_width=True)
 
     # Map view if we have coordinates
     if {"latitude", "longitude"}.issubset(df_filtered.columns):
@@ -1,23 +1,26 @@
-import requests
 from bs4 import BeautifulSoup
 import re
+from statistics import median
+from utils import transport
+from utils.arv_estimator import record_comps
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0",
 }
 
-def estimate_arv_from_redfin(city, state, zip_code, sqft=1200):
+def estimate_arv_from_redfin(city, state, zip_code, sqft=None, client=None):
     try:
         base_url = f"https://www.redfin.com/city/{city.replace(' ', '-')}/{state}/homes"
         sold_url = f"https://www.redfin.com/stingray/do/location-autocomplete?location={zip_code}&v=2&market=dallas"
-        loc_res = requests.get(sold_url, headers=HEADERS, timeout=10)
+        loc_res = transport.get(sold_url, headers=HEADERS, timeout=10, ttl=7 * 24 * 3600)
         loc_data = loc_res.json()
         if not loc_data or not loc_data.get("payload"):
             return None
 
         location = loc_data["payload"]["sections"][0]["rows"][0]["url"]
         full_url = f"https://www.redfin.com{location}/filter/include=sold-3mo"
-        page = requests.get(full_url, headers=HEADERS, timeout=10)
+        page = transport.get(full_url, headers=HEADERS, timeout=10, ttl=24 * 3600,
+                             cache_if=lambda r: "__REDFIN_INITIAL_STATE__" in r.text)
         soup = BeautifulSoup(page.text, "html.parser")
 
         script_tag = soup.find("script", text=re.compile("window.__REDFIN_INITIAL_STATE__"))
@@ -32,7 +35,13 @@ def estimate_arv_from_redfin(city, state, zip_code, sqft=1200):
         if not comps:
             return None
 
-        avg_ppsqft = sum(price / sqft for price, sqft in comps) / len(comps)
+        record_comps(zip_code, comps, client)
+
+        # Without the subject's size, price it like the typical comp
+        if not sqft:
+            sqft = median(s for _, s in comps)
+
+        avg_ppsqft = sum(price / s for price, s in comps) / len(comps)
         estimated_arv = round(avg_ppsqft * sqft)
 
         return {
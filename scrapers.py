@@ -1,47 +1,84 @@
 import os
-import requests
 import re
+import pandas as pd
 from bs4 import BeautifulSoup
 from datetime import datetime
 from supabase import create_client
 from redfin_comps import estimate_arv_from_redfin
+from utils import transport
+from utils.rules import RULES
+from utils.geocode import geocode_addresses, google_geocoder, map_urls
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+CHUNK_SIZE = 25
 
 print("🚀 Scraper started at", datetime.utcnow().isoformat())
 
-HOT_WORDS = ["cash", "as-is", "must sell", "motivated", "investor", "cheap", "urgent", "fast"]
-
 def normalize_price(val):
     try:
         return int("".join(filter(str.isdigit, str(val)))) if val else None
     except:
         return None
 
-def extract_address_from_post(url):
+def extract_post_details(url):
+    """(address, description) from a post page; either may be None."""
     try:
-        res = requests.get(url, timeout=10)
+        res = transport.get(url, timeout=10)
         soup = BeautifulSoup(res.text, "html.parser")
         address_tag = soup.select_one("div.mapaddress")
-        if address_tag:
-            return address_tag.text.strip()
+        body_tag = soup.select_one("#postingbody")
+        address = address_tag.text.strip() if address_tag else None
+        body = body_tag.get_text(" ", strip=True).replace("QR Code Link to This Post", "").strip() if body_tag else None
+        return address, body
     except Exception as e:
-        print("❌ Failed to extract address:", e)
-    return None
+        print("❌ Failed to extract post details:", e)
+    return None, None
+
+def split_address(address, default_city="Dallas", default_state="TX"):
+    """(city, state, zip) from a Craigslist map address; zip is None if absent."""
+    m = re.search(r"(?:,\s*([^,\d]+?))?(?:,\s*|\s+)([A-Z]{2})?\s*(\d{5})(?:-\d{4})?\s*$", address)
+    if not m:
+        return default_city, default_state, None
+    return (m.group(1) or default_city).strip(), m.group(2) or default_state, m.group(3)
 
-def insert_lead(data: dict):
+def insert_leads(posts: list):
     try:
-        supabase.table("craigslist_leads").upsert(data).execute()
-        print(f"✅ Inserted: {data.get('title')}")
+        supabase.table("craigslist_leads").upsert(posts).execute()
+        print(f"✅ Inserted {len(posts)} leads")
     except Exception as e:
         print("❌ Insert failed:", e)
 
+def flush(posts: list, addresses: list):
+    """Geocode, flag and upsert one chunk of posts."""
+    if not posts:
+        return
+    batch = pd.DataFrame(posts)
+
+    # 🗺️ Geocode the chunk (deduped + cached) and build Street View links
+    if GOOGLE_MAPS_API_KEY:
+        try:
+            batch[["latitude", "longitude"]] = geocode_addresses(
+                pd.Series(addresses, index=batch.index), google_geocoder(GOOGLE_MAPS_API_KEY)
+            )
+            batch["street_view_url"] = map_urls(batch)[1]
+        except Exception as e:
+            print("❌ Geocoding failed:", e)
+
+    # Equity rule when we have comps, hot-word fallback otherwise
+    batch["hot_lead"] = RULES.mask(batch, "craigslist_hot")
+    insert_leads(batch.astype(object).where(batch.notna(), None).to_dict("records"))
+
+# Posts are upserted in chunks as we go and the remainder in `finally`, so a
+# crash partway through still stores what was scraped; a failed upsert costs
+# one chunk, not the run
+posts, addresses = [], []
 try:
     print("📡 Scraping Craigslist…")
     url = "https://dallas.craigslist.org/search/rea?hasPic=1"
-    res = requests.get(url, timeout=10)
+    res = transport.get(url, timeout=10)
     soup = BeautifulSoup(res.text, "html.parser")
     rows = soup.select(".result-row")
 
@@ -59,7 +96,6 @@ try:
         link = title_tag["href"]
         price_tag = row.select_one(".result-price")
         price = normalize_price(price_tag.text) if price_tag else None
-        is_hot = any(word in title.lower() for word in HOT_WORDS)
 
         post = {
             "title": title,
@@ -71,27 +107,37 @@ try:
             "longitude": None,
             "arv": None,
             "equity": None,
-            "hot_lead": is_hot,
-            "street_view_url": None
+            "hot_lead": False,
+            "street_view_url": None,
+            "description": None
         }
 
-        # 🔍 Try to extract full address
-        address = extract_address_from_post(link)
+        # 🔍 Try to extract full address (and the description, which the app indexes for search)
+        address, body = extract_post_details(link)
+        post["description"] = body
         if address:
             print(f"📍 Found address: {address}")
             try:
-                comps = estimate_arv_from_redfin(address)
+                city, state, zip_code = split_address(address)
+                comps = (estimate_arv_from_redfin(city, state, zip_code, client=supabase) if zip_code else None) or {}
+                if comps.get("error"):
+                    print("❌ ARV fetch failed:", comps["error"])
                 arv = comps.get("estimated_arv")
                 post["arv"] = arv
                 post["equity"] = (arv or 0) - (price or 0)
-                post["hot_lead"] = (post["equity"] / arv >= 0.25) if arv and post["equity"] else is_hot
-                print(f"💰 ARV: {arv} | Equity: {post['equity']} | Hot: {post['hot_lead']}")
+                print(f"💰 ARV: {arv} | Equity: {post['equity']}")
             except Exception as e:
                 print("❌ ARV fetch failed:", e)
 
-        insert_lead(post)
+        posts.append(post)
+        addresses.append(address)
+        if len(posts) >= CHUNK_SIZE:
+            flush(posts, addresses)
+            posts, addresses = [], []
 
 except Exception as e:
     print("❌ Craigslist scraping failed:", e)
+finally:
+    flush(posts, addresses)
 
 print("✅ Scraper complete.")
@@ -1 +1,261 @@
-# Your estimate_arv function here...
\ No newline at end of file
+"""Offline ARV model used when Redfin can't give us a number.
+
+The model is a per-ZIP price-per-sqft table (shrunk toward the market-wide
+median for thin ZIPs) times the lead's square footage, with a small log-linear
+beds/baths adjustment on top. It is trained only on Redfin numbers — scraped sold
+comps and Redfin-confirmed upload ARVs — never on the `arv` column of
+propstream_leads, which also holds this model's own fallbacks.
+
+Labels and artifacts live in Supabase when a client is available
+(`arv_labels`, `arv_models`), so comps recorded on the scraper runner reach
+the app; the local CSV / models/ copies are the offline fallback and a
+per-process cache. The model is loaded once per process and applied to a
+whole DataFrame at a time.
+
+    python -m utils.arv_estimator [extra.csv ...]   # labels (+ Supabase if configured)
+"""
+import glob
+import json
+import os
+import re
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.export import iter_table
+from utils.geocode import normalize_address
+
+MODEL_DIR = os.getenv("ARV_MODEL_DIR", "models")
+COMPS_FILE = os.getenv("ARV_COMPS_FILE", "comps.csv")
+ENRICHED_FILE = os.getenv("ARV_ENRICHED_FILE", "enriched_arvs.csv")
+LABELS_TABLE = "arv_labels"    # key (unique), source, zip, price, sqft, beds, baths, recorded_at
+MODELS_TABLE = "arv_models"    # version, trained_at, model (jsonb)
+SHRINK = 5          # pseudo-count pulling small ZIPs toward the global median
+HOLDOUT = 0.2
+BASE_BEDS, BASE_BATHS = 3, 2
+
+_MODEL = None
+
+
+def _prep(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce the columns the model uses; missing ones become NaN."""
+    out = pd.DataFrame(index=df.index)
+    out["zip"] = df["zip"].astype(str).str[:5] if "zip" in df else ""
+    for col in ["sqft", "beds", "baths", "price"]:
+        out[col] = pd.to_numeric(df[col], errors="coerce") if col in df else np.nan
+    return out
+
+
+def _fit(data: pd.DataFrame) -> dict:
+    data = data[data["price"] > 0]
+    sized = data[data["sqft"] > 0]
+    ppsf = sized["price"] / sized["sqft"]
+    global_ppsf = float(ppsf.median()) if len(ppsf) else 0.0
+    global_price = float(data["price"].median())
+
+    by_zip = pd.DataFrame({
+        "ppsf": ppsf.groupby(sized["zip"]).median(),
+        "n": ppsf.groupby(sized["zip"]).size(),
+        "price": data.groupby("zip")["price"].median(),
+    })
+    by_zip["n"] = by_zip["n"].fillna(0)
+    by_zip["ppsf"] = (
+        (by_zip["ppsf"].fillna(0) * by_zip["n"] + global_ppsf * SHRINK) / (by_zip["n"] + SHRINK)
+    )
+
+    model = {
+        "global_ppsf": global_ppsf,
+        "global_price": global_price,
+        "zips": {z: [float(r.ppsf), float(r.price)] for z, r in by_zip.iterrows()},
+        "coef": [0.0, 0.0, 0.0],
+    }
+
+    # beds/baths adjustment: log(price / base) ~ 1 + (beds-3) + (baths-2)
+    base = _base_value(model, data)
+    ok = np.isfinite(base) & (base > 0)
+    if ok.sum() >= 10:
+        X = _design(data[ok])
+        y = np.log(data["price"].to_numpy()[ok] / base[ok])
+        model["coef"] = [float(c) for c in np.linalg.lstsq(X, y, rcond=None)[0]]
+    return model
+
+
+def _design(data: pd.DataFrame) -> np.ndarray:
+    beds = data["beds"].fillna(BASE_BEDS).to_numpy() - BASE_BEDS
+    baths = data["baths"].fillna(BASE_BATHS).to_numpy() - BASE_BATHS
+    return np.column_stack([np.ones(len(data)), beds, baths])
+
+
+def _base_value(model: dict, data: pd.DataFrame) -> np.ndarray:
+    if model["zips"]:
+        zips = pd.Index(list(model["zips"]))
+        table = np.array(list(model["zips"].values()), dtype=float).reshape(-1, 2)
+        idx = zips.get_indexer(data["zip"])
+        known = idx >= 0
+        ppsf = np.where(known, table[idx, 0], model["global_ppsf"])
+        zip_price = np.where(known, table[idx, 1], model["global_price"])
+    else:
+        ppsf, zip_price = model["global_ppsf"], model["global_price"]
+    sqft = data["sqft"].to_numpy(dtype=float)
+    return np.where(sqft > 0, ppsf * sqft, zip_price)
+
+
+def predict(df: pd.DataFrame, model: dict = None) -> np.ndarray:
+    """Score every row of `df` in one vectorized pass."""
+    model = model or load_model()
+    if model is None:
+        raise FileNotFoundError(f"No ARV model found in {MODEL_DIR}/")
+    data = _prep(df)
+    return _base_value(model, data) * np.exp(_design(data) @ np.asarray(model["coef"]))
+
+
+def holdout_report(data: pd.DataFrame, seed: int = 0) -> dict:
+    data = data[data["price"] > 0]
+    test = np.random.default_rng(seed).random(len(data)) < HOLDOUT
+    model = _fit(data[~test])
+    actual = data.loc[test, "price"].to_numpy()
+    pred = predict(data[test], model)
+    err = np.abs(pred - actual)
+    return {
+        "n_train": int((~test).sum()),
+        "n_test": int(test.sum()),
+        "mae": float(err.mean()) if len(err) else None,
+        "mape": float((err / actual).mean() * 100) if len(err) else None,
+        "median_ape": float(np.median(err / actual) * 100) if len(err) else None,
+    }
+
+
+def train(df: pd.DataFrame, client=None) -> dict:
+    """Fit on all rows, attach a holdout report, and save the next version
+    (locally, and to `arv_models` when a client is given)."""
+    data = _prep(df)
+    report = holdout_report(data)
+    model = _fit(data[data["price"] > 0])
+    model["version"] = max(_latest_version(), _remote_version(client)) + 1
+    model["trained_at"] = datetime.utcnow().isoformat()
+    model["rows"] = int((data["price"] > 0).sum())
+    model["holdout"] = report
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    path = os.path.join(MODEL_DIR, f"arv_model_v{model['version']}.json")
+    with open(path, "w") as f:
+        json.dump(model, f)
+    if client is not None:
+        client.table(MODELS_TABLE).insert(
+            {"version": model["version"], "trained_at": model["trained_at"], "model": model}
+        ).execute()
+    print(f"💾 Saved {path} — holdout MAE ${report['mae'] or 0:,.0f}, "
+          f"MAPE {report['mape'] or 0:.1f}% on {report['n_test']} rows")
+    return model
+
+
+def _latest_version() -> int:
+    versions = [
+        int(m.group(1))
+        for p in glob.glob(os.path.join(MODEL_DIR, "arv_model_v*.json"))
+        if (m := re.search(r"_v(\d+)\.json$", p))
+    ]
+    return max(versions, default=0)
+
+
+def _remote_version(client) -> int:
+    if client is None:
+        return 0
+    rows = client.table(MODELS_TABLE).select("version").order("version", desc=True).limit(1).execute().data
+    return int(rows[0]["version"]) if rows else 0
+
+
+def _fetch_model(client):
+    """Newest artifact in `arv_models`, cached into MODEL_DIR; None on failure."""
+    try:
+        rows = client.table(MODELS_TABLE).select("model").order("version", desc=True).limit(1).execute().data
+    except Exception as e:
+        print("⚠️ Could not fetch ARV model from Supabase:", e)
+        return None
+    if not rows:
+        return None
+    model = rows[0]["model"]
+    model = json.loads(model) if isinstance(model, str) else model
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(os.path.join(MODEL_DIR, f"arv_model_v{model['version']}.json"), "w") as f:
+        json.dump(model, f)
+    return model
+
+
+def load_model(reload: bool = False, client=None):
+    """Load the newest artifact once per process; None if never trained.
+    With a client, a newer version in `arv_models` wins over models/."""
+    global _MODEL
+    if _MODEL is None or reload:
+        remote = _fetch_model(client) if client is not None else None
+        version = _latest_version()
+        if remote is not None and remote["version"] >= version:
+            _MODEL = remote
+        elif version:
+            with open(os.path.join(MODEL_DIR, f"arv_model_v{version}.json")) as f:
+                _MODEL = json.load(f)
+    return _MODEL
+
+
+def _record(rows: pd.DataFrame, path: str, client=None):
+    """Labels go to `arv_labels` (upsert on key, so re-scraped comps and
+    re-enriched leads aren't counted twice); CSV only without a client."""
+    rows["recorded_at"] = datetime.utcnow().isoformat()
+    rows = rows.drop_duplicates("key", keep="last")
+    if client is None:
+        rows.to_csv(path, mode="a", header=not os.path.exists(path), index=False)
+        return
+    records = rows.astype(object).where(rows.notna(), None).to_dict("records")
+    client.table(LABELS_TABLE).upsert(records, on_conflict="key").execute()
+
+
+def record_comps(zip_code, comps, client=None):
+    """Store scraped (price, sqft) Redfin sold comps as training labels."""
+    if not comps:
+        return
+    rows = pd.DataFrame(comps, columns=["price", "sqft"])
+    rows.insert(0, "zip", str(zip_code)[:5])
+    rows.insert(0, "source", "comp")
+    rows.insert(0, "key", "comp:" + rows["zip"] + "|" + rows["price"].astype(str) + "|" + rows["sqft"].astype(str))
+    _record(rows, COMPS_FILE, client)
+
+
+def record_enriched(df: pd.DataFrame, client=None):
+    """Store Redfin ARVs from upload enrichment (with the lead's size) as labels."""
+    if df.empty:
+        return
+    zips = df["zip"].astype(str).str[:5]
+    rows = pd.DataFrame({
+        "key": "redfin:" + normalize_address(df["address"]) + "|" + zips,
+        "source": "redfin",
+        "zip": zips,
+        "price": pd.to_numeric(df["Redfin_ARV"], errors="coerce"),
+        **{c: pd.to_numeric(df[c], errors="coerce") if c in df else np.nan for c in ["sqft", "beds", "baths"]},
+    }).dropna(subset=["price"])
+    _record(rows, ENRICHED_FILE, client)
+
+
+def training_frame(supabase=None) -> pd.DataFrame:
+    """Redfin-confirmed labels: `arv_labels` (paged) plus any local CSVs,
+    one row per label key."""
+    frames = [pd.read_csv(p, dtype={"zip": str}) for p in [COMPS_FILE, ENRICHED_FILE] if os.path.exists(p)]
+    if supabase is not None:
+        frames += list(iter_table(supabase, LABELS_TABLE, order="key"))
+    if not frames:
+        return pd.DataFrame()
+    data = pd.concat(frames, ignore_index=True)
+    return data.drop_duplicates("key", keep="last") if "key" in data else data
+
+
+if __name__ == "__main__":
+    client = None
+    if os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_KEY"):
+        from supabase import create_client
+        client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    frames = [training_frame(client), *(pd.read_csv(p, dtype={"zip": str}) for p in sys.argv[1:])]
+    data = pd.concat(frames, ignore_index=True)
+    if data.empty:
+        sys.exit(f"No training data: record comps/enrichments first ({LABELS_TABLE}, {COMPS_FILE}, {ENRICHED_FILE})")
+    train(data, client)
@@ -0,0 +1,64 @@
+"""Portfolio-wide MAO / spread / assignment-fee math.
+
+The Deal Tools calculator does `arv * offer_pct - repairs` for one deal. Here
+the same formula is broadcast over a (lead × offer % × repair scenario)
+array, so 100k leads × 50 scenarios is one vectorized pass instead of a
+Python loop:
+
+    MAO    = ARV · offer% − repairs
+    spread = MAO − acquisition price     (what an end buyer pays above our contract)
+    fee    = spread, where it clears the target (projected assignment fee)
+
+Repair scenarios are either a share of each lead's ARV or flat dollars.
+"""
+import numpy as np
+import pandas as pd
+
+OFFER_PCTS = np.round(np.arange(0.60, 0.801, 0.02), 2)
+REPAIR_PCTS = np.array([0.05, 0.10, 0.15, 0.20, 0.25])
+TARGET_SPREAD = 10_000
+
+
+def deal_grid(arv, price, offer_pcts, repairs, repairs_pct: bool = True, dtype=np.float32):
+    """(mao, spread), each shaped (leads, offer_pcts, repairs)."""
+    arv = np.asarray(arv, dtype=dtype)[:, None, None]
+    price = np.asarray(price, dtype=dtype)[:, None, None]
+    pcts = np.asarray(offer_pcts, dtype=dtype)[None, :, None]
+    rep = np.asarray(repairs, dtype=dtype)[None, None, :]
+    if repairs_pct:
+        rep = arv * rep
+    mao = arv * pcts - rep
+    return mao, mao - price
+
+
+def scenario_summary(arv, price, offer_pcts=OFFER_PCTS, repairs=REPAIR_PCTS, repairs_pct: bool = True,
+                     target_spread: float = TARGET_SPREAD) -> pd.DataFrame:
+    """One row per (offer %, repairs): deals clearing the target spread,
+    their total/average projected fee, and the median spread over all leads."""
+    _, spread = deal_grid(arv, price, offer_pcts, repairs, repairs_pct)
+    clears = spread >= target_spread
+    deals = np.count_nonzero(clears, axis=0)
+    fees = np.where(clears, spread, 0).sum(axis=0, dtype=np.float64)
+    median = np.median(spread, axis=0) if len(spread) else np.full(deals.shape, np.nan)
+
+    p, r = np.meshgrid(np.asarray(offer_pcts), np.asarray(repairs), indexing="ij")
+    return pd.DataFrame({
+        "offer_pct": p.ravel(),
+        "repairs": r.ravel(),
+        "deals": deals.ravel(),
+        "total_fee": fees.ravel(),
+        "avg_fee": np.divide(fees, deals, out=np.zeros_like(fees), where=deals > 0).ravel(),
+        "median_spread": median.ravel(),
+    })
+
+
+def lead_deals(df: pd.DataFrame, arv_col: str, price_col: str, offer_pct: float, repairs: float,
+               repairs_pct: bool = True, target_spread: float = TARGET_SPREAD) -> pd.DataFrame:
+    """Per-lead MAO / Spread / Assignment Fee for one scenario, best spread first."""
+    arv = pd.to_numeric(df[arv_col], errors="coerce").to_numpy(dtype=float)
+    price = pd.to_numeric(df[price_col], errors="coerce").to_numpy(dtype=float)
+    rep = arv * repairs if repairs_pct else np.full(len(df), float(repairs))
+    mao = arv * offer_pct - rep
+    spread = mao - price
+    out = df.assign(MAO=mao, Repairs=rep, Spread=spread, **{"Assignment Fee": np.where(spread >= target_spread, spread, 0.0)})
+    return out.sort_values("Spread", ascending=False)
@@ -1 +1,230 @@
-# Your enrich_lead function here...
\ No newline at end of file
+"""Redfin ARV enrichment for uploaded PropStream leads.
+
+Nothing in here touches Streamlit, so the same code runs inside the page,
+in background jobs and from scripts.
+
+Redfin calls are the expensive part, so `plan_enrichment` spends them best
+first: rows that can't qualify even with an optimistic ARV are pruned, the
+rest are popped from a heap by expected equity, and the plan stops when
+the job's request or time budget runs out.
+"""
+import heapq
+import io
+import json
+import re
+import time
+from urllib.parse import quote_plus
+
+import numpy as np
+import pandas as pd
+
+from utils import arv_estimator, transport
+from utils.geocode import normalize_address
+from utils.rules import RULES
+
+UPLOAD_COLUMNS = {
+    "Property Address": "address",
+    "City":              "city",
+    "State":             "state",
+    "Zip Code":          "zip",
+    "Amount Owed":       "owed",
+    "Estimated Value":   "est_value",
+    "Living Square Feet": "sqft",
+    "Bedrooms":          "beds",
+    "Bathrooms":         "baths",
+}
+QUALIFY_ALIASES = {"arv": "Redfin_ARV", "equity_pct": "Redfin_Equity%"}
+# Redfin comps rarely come in this far above PropStream's own estimate
+OPTIMISTIC_ARV = 1.3
+
+
+def estimate_redfin_arv(address, city, state, zip_code):
+    """Fetch average sold price from Redfin CSV API with robust fallback."""
+    q = quote_plus(f"{address}, {city}, {state} {zip_code}")
+    url = f"https://www.redfin.com/stingray/api/gis-csv?al=1&include=sold&location={q}"
+    # Redfin answers throttles/errors with a 200 and a "[...]" body — don't cache those
+    resp = transport.get(url, headers={"User-Agent": "Mozilla/5.0"}, ttl=24 * 3600,
+                         cache_if=lambda r: not r.text.lstrip().startswith("["))
+    text = resp.text.strip()
+
+    # 1) Catch Redfin error responses
+    if text.startswith("["):
+        m = re.search(r'\{.*\}', text)
+        if m:
+            err = json.loads(m.group(0))
+            print(f"⚠️ Redfin error for {address}: {err.get('errorMessage')}")
+        else:
+            print(f"⚠️ Unexpected Redfin response for {address}")
+        return None
+
+    # 2) Parse CSV
+    df = pd.read_csv(io.StringIO(text))
+
+    # 3) Try obvious column names
+    candidates = [c for c in df.columns if re.search(r"(price|sale)", c, re.IGNORECASE)]
+    price_col = candidates[0] if candidates else None
+
+    # 4) Fallback: find any column where >50% of entries parse as numbers
+    if not price_col:
+        for c in df.columns:
+            cleaned = (
+                df[c].astype(str)
+                      .str.replace(r"[^\d\.]", "", regex=True)
+            )
+            nums = pd.to_numeric(cleaned, errors="coerce")
+            if nums.notna().sum() / len(nums) > 0.5:
+                price_col = c
+                break
+
+    if not price_col:
+        print(f"⚠️ No numeric price column for {address}; skipping ARV.")
+        return None
+
+    # 5) Clean & average
+    df[price_col] = (
+        df[price_col].astype(str)
+                     .replace(r"[\$,]", "", regex=True)
+                     .astype(float)
+    )
+    return df[price_col].mean()
+
+
+def prepare_upload(df: pd.DataFrame) -> pd.DataFrame:
+    """Rename a PropStream export to our columns and coerce the money fields.
+
+    Columns a county export doesn't have are added empty."""
+    df = df.rename(columns=UPLOAD_COLUMNS)
+    for col in ["address", "city", "state", "zip"]:
+        if col not in df.columns:
+            df[col] = ""
+    df["owed"]      = pd.to_numeric(df.get("owed"), errors="coerce").fillna(0) if "owed" in df else 0.0
+    df["est_value"] = pd.to_numeric(df.get("est_value"), errors="coerce").fillna(0) if "est_value" in df else 0.0
+    return df
+
+
+def enrich_row(row: dict, params: dict = None) -> dict:
+    """Redfin ARV for one lead (None when Redfin has nothing)."""
+    try:
+        arv = estimate_redfin_arv(row["address"], row["city"], row["state"], row["zip"])
+    except Exception as e:
+        print(f"❌ Redfin lookup failed for {row.get('address')}: {e}")
+        arv = None
+    return {"Redfin_ARV": arv, "enrich_status": "redfin" if arv is not None else "no_match"}
+
+
+def _equity_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df["Redfin_Equity"] = df["Redfin_ARV"] - df["owed"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        df["Redfin_Equity%"] = (df["Redfin_Equity"] / df["Redfin_ARV"]) * 100
+    return df
+
+
+def viable(df: pd.DataFrame, optimistic: float = OPTIMISTIC_ARV) -> pd.Series:
+    """Rows that could still qualify if Redfin came back at `optimistic` × est_value.
+
+    The buy box only gets easier as ARV rises, so failing it at the optimistic
+    ARV means no Redfin answer can qualify the row. Rows without an estimate
+    can't be ruled out.
+    """
+    est = pd.to_numeric(df["est_value"], errors="coerce").fillna(0)
+    best = _equity_columns(df.assign(Redfin_ARV=est * optimistic))
+    return RULES.mask(best, "qualified", aliases=QUALIFY_ALIASES) | (est <= 0)
+
+
+def plan_enrichment(rows: list, params: dict = None):
+    """Row indices to enrich, highest expected equity first, within budget.
+
+    params: max_requests (Redfin calls), max_seconds (wall time), optimistic
+    (ARV multiplier for pruning). 0/None means no limit.
+    """
+    params = params or {}
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return
+    keep = viable(df, params.get("optimistic") or OPTIMISTIC_ARV).to_numpy()
+    # expected equity from PropStream's numbers; rows without an estimate go last
+    expected = np.where(df["est_value"] > 0, df["est_value"] - df["owed"], -np.inf)
+    heap = [(-expected[i], i) for i in np.flatnonzero(keep)]
+    heapq.heapify(heap)
+
+    max_requests = params.get("max_requests") or None
+    max_seconds = params.get("max_seconds") or None
+    start, sent = time.monotonic(), 0
+    while heap:
+        if max_requests and sent >= max_requests:
+            break
+        if max_seconds and time.monotonic() - start >= max_seconds:
+            break
+        sent += 1
+        yield int(heapq.heappop(heap)[1])
+
+
+def finalize(df: pd.DataFrame, client=None) -> pd.DataFrame:
+    """Fill Redfin misses from the local model, then derive equity columns.
+    With a client the newest model in Supabase is used."""
+    df = df.copy()
+    df["Redfin_ARV"] = pd.to_numeric(df.get("Redfin_ARV"), errors="coerce")
+    missing = df["Redfin_ARV"].isna()
+    if missing.any():
+        model = arv_estimator.load_model(client=client)
+        if model is not None:
+            df.loc[missing, "Redfin_ARV"] = arv_estimator.predict(df[missing], model)
+        else:
+            df.loc[missing, "Redfin_ARV"] = df.loc[missing, "est_value"] * 0.7
+    return _equity_columns(df)
+
+
+def qualify(df: pd.DataFrame) -> pd.DataFrame:
+    """Leads passing the 'qualified' buy box, best equity first.
+
+    Rows `viable` pruned were never looked up; the model ARV finalize gave
+    them doesn't get to qualify them."""
+    mask = RULES.mask(df, "qualified", aliases=QUALIFY_ALIASES)
+    if "est_value" in df.columns:
+        status = df["enrich_status"] if "enrich_status" in df.columns else pd.Series(None, index=df.index)
+        mask &= viable(df) | (status == "redfin")
+    qualified = df[mask].copy()
+    return qualified.sort_values("Redfin_Equity%", ascending=False)
+
+
+def confirmed(df: pd.DataFrame) -> pd.DataFrame:
+    """Qualified leads among rows Redfin has already priced (no model/0.7×
+    fallbacks — those are estimates, not confirmations)."""
+    if "enrich_status" not in df.columns:
+        # queued / before the first checkpoint: empty, but with the Redfin columns
+        return qualify(finalize(df.iloc[:0]))
+    return qualify(finalize(df[df["enrich_status"] == "redfin"]))
+
+
+def to_propstream_rows(df: pd.DataFrame) -> list:
+    """Map enriched upload rows onto the propstream_leads schema."""
+    rows = pd.DataFrame({
+        "title": df["address"],
+        "address": df["address"],
+        "city": df["city"],
+        "state": df["state"],
+        "zip": df["zip"].astype(str),
+        "price": df["owed"],
+        "arv": df["Redfin_ARV"].round(2),
+        "equity": df["Redfin_Equity"].round(2),
+        "hot_lead": RULES.mask(df, "qualified", aliases=QUALIFY_ALIASES),
+        "category": "Upload",
+        "date_posted": pd.Timestamp.utcnow().isoformat(),
+    })
+    # stable per-property key, so storing the same lead again updates it
+    rows["link"] = "upload:" + normalize_address(rows["address"]) + "|" + rows["zip"].str[:5]
+    rows = rows.drop_duplicates("link", keep="last")
+    return rows.astype(object).where(rows.notna(), None).to_dict("records")
+
+
+def store_enriched(client, df: pd.DataFrame, batch_size: int = 500) -> int:
+    """Upsert qualified, enriched leads into propstream_leads in bulk.
+
+    Keyed on `link` (needs a unique constraint), so a job whose finish step
+    runs twice doesn't insert its leads twice."""
+    if "enrich_status" in df.columns:
+        arv_estimator.record_enriched(df[df["enrich_status"] == "redfin"], client)
+    rows = to_propstream_rows(qualify(finalize(df, client)))
+    for i in range(0, len(rows), batch_size):
+        client.table("propstream_leads").upsert(rows[i:i + batch_size], on_conflict="link").execute()
+    return len(rows)
@@ -0,0 +1,176 @@
+"""Chunked CSV / Parquet / XLSX writers for lead exports.
+
+Every writer takes an iterable of DataFrame chunks and streams them to disk,
+so an export never holds more than one chunk (plus the writer's buffer) in
+memory regardless of how many leads it covers.
+"""
+import operator
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 50_000
+PAGE_SIZE = 1000  # PostgREST returns at most 1000 rows per select
+
+MIME_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# (column, op, value) filters — op names match the supabase query builder
+_OPS = {
+    "eq": operator.eq,
+    "neq": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in_": lambda s, v: s.isin(list(v)),
+}
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int = CHUNK_ROWS):
+    """Yield row slices of an in-memory frame (views, not copies)."""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def iter_table(client, table: str, columns=None, filters=None, order: str = "id", page_size: int = PAGE_SIZE):
+    """Page through a Supabase table, yielding one DataFrame per page.
+
+    Column selection and filters are pushed down to PostgREST, so rows we
+    would drop never leave the database.
+    """
+    select = ",".join(columns) if columns else "*"
+    start = 0
+    while True:
+        query = client.table(table).select(select)
+        for col, op, val in filters or []:
+            query = getattr(query, op)(col, val)
+        rows = query.order(order).range(start, start + page_size - 1).execute().data or []
+        if not rows:
+            break
+        yield pd.DataFrame(rows)
+        if len(rows) < page_size:
+            break
+        start += page_size
+
+
+def apply_filters(df: pd.DataFrame, filters=None, columns=None) -> pd.DataFrame:
+    """Apply the same (column, op, value) filters to a local chunk."""
+    if filters:
+        mask = np.ones(len(df), dtype=bool)
+        for col, op, val in filters:
+            mask &= _OPS[op](df[col], val).to_numpy(dtype=bool, na_value=False)
+        df = df[mask]
+    if columns:
+        df = df[[c for c in columns if c in df.columns]]
+    return df
+
+
+def write_csv(chunks, path: str) -> int:
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        for chunk in chunks:
+            chunk.to_csv(fh, header=rows == 0, index=False)
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(chunks, path: str) -> int:
+    """Spill each chunk to a temp Arrow file with its own inferred types, then
+    write them all under one schema widened to fit every chunk.
+
+    A Parquet file has one schema, but a single page can't settle it: a
+    column may be all-null on the first page (craigslist lat/long/arv), and
+    PostgREST sends whole numerics as JSON ints, so 150000 and 150000.5 can
+    land on different pages. Columns that stay ints (ids) keep their type.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    rows = 0
+    with tempfile.TemporaryDirectory(prefix="parquet_spill_") as spill:
+        parts, schemas = [], []
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            parts.append(os.path.join(spill, f"{len(parts)}.arrow"))
+            with pa.OSFile(parts[-1], "wb") as sink, pa.ipc.new_file(sink, table.schema) as spill_writer:
+                spill_writer.write_table(table)
+            schemas.append(table.schema.remove_metadata())
+            rows += len(chunk)
+        if not parts:
+            pq.write_table(pa.table({}), path)
+            return 0
+
+        schema = pa.unify_schemas(schemas, promote_options="permissive")
+        # null on every page: nothing to go on, store as text
+        schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+        with pq.ParquetWriter(path, schema) as writer:
+            for part in parts:
+                with pa.OSFile(part) as source:
+                    table = pa.ipc.open_file(source).read_all()
+                for field in schema:
+                    if field.name not in table.column_names:
+                        table = table.append_column(field.name, pa.nulls(len(table), field.type))
+                writer.write_table(table.select(schema.names).cast(schema))
+    return rows
+
+
+def _xlsx_value(v):
+    if v is None or (isinstance(v, float) and np.isnan(v)) or v is pd.NaT:
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.tz_localize(None).to_pydatetime() if v.tzinfo else v.to_pydatetime()
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, (list, dict)):
+        return str(v)
+    return v
+
+
+def write_xlsx(chunks, path: str, sheet_name: str = "Leads") -> int:
+    """Write in openpyxl write-only mode: rows go straight to the zip stream."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    rows = 0
+    for chunk in chunks:
+        if rows == 0:
+            ws.append(list(chunk.columns))
+        for row in chunk.itertuples(index=False, name=None):
+            ws.append([_xlsx_value(v) for v in row])
+        rows += len(chunk)
+    wb.save(path)
+    return rows
+
+
+WRITERS = {
+    "csv": write_csv,
+    "parquet": write_parquet,
+    "xlsx": write_xlsx,
+}
+
+
+def export(chunks, fmt: str, path: str, columns=None, filters=None) -> int:
+    """Filter/select each chunk, then stream it through the format's writer."""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    selected = (apply_filters(c, filters, columns) for c in chunks)
+    return WRITERS[fmt]((c for c in selected if not c.empty), path)
+
+
+def export_file(chunks, fmt: str, columns=None, filters=None):
+    """Export to a temp file and return (path, row_count); caller removes it."""
+    fd, path = tempfile.mkstemp(suffix=f".{fmt}", prefix="leads_export_")
+    os.close(fd)
+    try:
+        rows = export(chunks, fmt, path, columns=columns, filters=filters)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, rows
@@ -0,0 +1,188 @@
+"""Cross-process cache for the Supabase lead frames.
+
+Each frame lives on local disk as an Arrow IPC file plus a small JSON meta
+file. Every web worker memory-maps the same file, so the OS page cache holds
+one copy no matter how many processes read it. Numeric/date columns come out
+of `to_pandas(split_blocks=True)` without a copy, and text columns become
+Arrow-backed strings that point into the mapped file instead of per-process
+Python objects.
+
+Refreshing is single-flight: whichever worker finds the frame stale takes a
+file lock and asks the cheap `version()` callback whether anything changed.
+Only if it did does that worker run `build()` and publish a new file; the
+others keep serving the previous file meanwhile. The version only sees new
+rows, so a frame older than MAX_AGE is rebuilt anyway to pick up edits to
+existing rows (geocode backfills, status changes from other processes).
+
+Derived caches that merge new rows incrementally key on `frame_epoch`,
+which only moves when rows may have been edited or deleted (invalidate()
+after our own writes, or a MAX_AGE rebuild) — not when rows are added.
+"""
+import fcntl
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+
+FRAME_CACHE_DIR = os.getenv("FRAME_CACHE_DIR", os.path.join(tempfile.gettempdir(), "lead_frames"))
+CHECK_EVERY = 300  # seconds between version checks, like the old ttl=300
+MAX_AGE = 900      # seconds before a rebuild regardless of version
+
+_local = {}  # name -> (data file, DataFrame) for this process
+_local_lock = threading.Lock()
+
+
+def _path(name, suffix):
+    return os.path.join(FRAME_CACHE_DIR, f"{name}{suffix}")
+
+
+def _read_meta(name):
+    try:
+        with open(_path(name, ".json")) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(name, meta):
+    fd, tmp = tempfile.mkstemp(dir=FRAME_CACHE_DIR)
+    with os.fdopen(fd, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, _path(name, ".json"))
+
+
+@contextmanager
+def _file_lock(name, blocking):
+    """Yields True if this process got the refresh lock."""
+    os.makedirs(FRAME_CACHE_DIR, exist_ok=True)
+    with open(_path(name, ".lock"), "w") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _arrow_table(df: pd.DataFrame) -> pa.Table:
+    """Arrow can't hold mixed-type object columns; store those as text."""
+    df = df.copy(deep=False)
+    for col in df.columns[df.dtypes == object]:
+        try:
+            pa.array(df[col], from_pandas=True)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            df[col] = df[col].astype(str)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _publish(name, df, version, epoch: int = 0):
+    old = _read_meta(name)
+    data_file = f"{name}-{time.time_ns()}.arrow"
+    tmp = _path(data_file, ".tmp")
+    table = _arrow_table(df)
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, os.path.join(FRAME_CACHE_DIR, data_file))
+    now = time.time()
+    meta = {"version": version, "file": data_file, "rows": len(df), "built_at": now, "checked_at": now,
+            "epoch": epoch}
+    _write_meta(name, meta)
+    # keep the previous generation too: another worker may have read the old
+    # meta and not mapped its file yet
+    keep = {data_file, old.get("file") if old else None}
+    for path in glob.glob(os.path.join(FRAME_CACHE_DIR, f"{name}-*.arrow")):
+        if os.path.basename(path) not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return meta
+
+
+def _string_dtype(arrow_type):
+    """Arrow-backed pandas strings for text columns; numpy for the rest."""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype("pyarrow")
+    return None
+
+
+def _read(name, meta) -> pd.DataFrame:
+    with _local_lock:
+        hit = _local.get(name)
+        if hit and hit[0] == meta["file"]:
+            return hit[1]
+    try:
+        source = pa.memory_map(os.path.join(FRAME_CACHE_DIR, meta["file"]))
+    except FileNotFoundError:
+        # our meta is more than one generation behind; the current file exists
+        fresh = _read_meta(name)
+        if not fresh or fresh["file"] == meta["file"]:
+            raise
+        return _read(name, fresh)
+    df = pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True, types_mapper=_string_dtype)
+    with _local_lock:
+        _local[name] = (meta["file"], df)
+    return df
+
+
+def load_frame(name: str, build, version, check_every: float = CHECK_EVERY,
+               max_age: float = MAX_AGE) -> pd.DataFrame:
+    """Shared, versioned frame. Treat the result as read-only (copy before mutating)."""
+    meta = _read_meta(name)
+    if meta and time.time() - meta["checked_at"] < check_every:
+        return _read(name, meta)
+
+    # first build waits for whoever holds the lock; stale readers don't
+    with _file_lock(name, blocking=meta is None) as owner:
+        if not owner:
+            return _read(name, meta)
+        meta = _read_meta(name)
+        if meta and time.time() - meta["checked_at"] < check_every:
+            return _read(name, meta)
+        current = version()
+        if meta and meta["version"] == current and time.time() - meta["built_at"] < max_age:
+            meta["checked_at"] = time.time()
+            _write_meta(name, meta)
+        else:
+            # a new version means new rows; anything else may be edits/deletes
+            epoch = meta.get("epoch", 0) + int(meta["version"] in (None, current)) if meta else 0
+            meta = _publish(name, build(), current, epoch)
+    return _read(name, meta)
+
+
+def frame_version(name: str):
+    """Version string of the published frame (for keying derived caches)."""
+    meta = _read_meta(name)
+    return f"{meta['version']}@{meta['built_at']}" if meta else None
+
+
+def frame_epoch(name: str):
+    """Changes only when existing rows may have changed (not on new rows)."""
+    meta = _read_meta(name)
+    return meta.get("epoch", 0) if meta else None
+
+
+def invalidate(name: str):
+    """Force the next load to re-check the version (after writes we made)."""
+    meta = _read_meta(name)
+    if meta:
+        meta["checked_at"] = 0
+        meta["version"] = None
+        _write_meta(name, meta)
+
+
+def table_version(client, table: str, time_col: str = "date_posted") -> str:
+    """Cheap change detector: row count plus newest timestamp. Edits to
+    existing rows don't show up here; load_frame's max_age covers those."""
+    resp = client.table(table).select(time_col, count="exact").order(time_col, desc=True).limit(1).execute()
+    latest = resp.data[0][time_col] if resp.data else None
+    return f"{resp.count}:{latest}"
@@ -0,0 +1,186 @@
+"""Batch geocoding with a persistent address → coordinates cache.
+
+A batch is deduped by normalized address, repeats are served from a SQLite
+cache, and only the misses go to the geocoder — concurrently, but never
+faster than the configured rate. The geocoder is any callable
+`address -> (lat, lng) | None`, so a local fake can stand in for Google.
+
+    python -m utils.geocode      # backfill propstream_leads coordinates
+"""
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from utils import transport
+
+GEOCODE_CACHE = os.getenv("GEOCODE_CACHE", "geocode_cache.sqlite")
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+RATE_PER_SEC = 10   # stay well under Google's 50 QPS default
+MAX_WORKERS = 8
+BATCH_SIZE = 500
+
+MAP_URL = "https://www.google.com/maps?q="
+STREET_VIEW_URL = "https://www.google.com/maps/@?api=1&map_action=pano&viewpoint="
+
+
+def normalize_address(addresses: pd.Series) -> pd.Series:
+    return (
+        addresses.fillna("").astype(str).str.upper()
+                 .str.replace(r"[^\w\s]", " ", regex=True)
+                 .str.split().str.join(" ")
+    )
+
+
+class GeocodeCache:
+    """address → (lat, lng); a NULL pair records a definite 'not found'."""
+
+    def __init__(self, path: str = GEOCODE_CACHE):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode_cache ("
+            "address TEXT PRIMARY KEY, lat REAL, lng REAL, fetched_at TEXT)"
+        )
+
+    def get_many(self, addresses) -> dict:
+        found = {}
+        addresses = list(addresses)
+        for i in range(0, len(addresses), BATCH_SIZE):
+            chunk = addresses[i:i + BATCH_SIZE]
+            rows = self.conn.execute(
+                f"SELECT address, lat, lng FROM geocode_cache WHERE address IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            found.update({a: (lat, lng) if lat is not None else None for a, lat, lng in rows})
+        return found
+
+    def put_many(self, coords: dict):
+        now = datetime.utcnow().isoformat()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO geocode_cache VALUES (?, ?, ?, ?)",
+                [(a, *(c or (None, None)), now) for a, c in coords.items()],
+            )
+
+
+class RateLimiter:
+    """Spaces calls at least 1/per_second apart across threads."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            at = max(now, self.next_at)
+            self.next_at = at + self.interval
+        time.sleep(max(0.0, at - now))
+
+
+def _is_answer(resp) -> bool:
+    try:
+        return resp.json().get("status") in ("OK", "ZERO_RESULTS")
+    except ValueError:
+        return False
+
+
+def google_geocoder(api_key: str, http_get=transport.get):
+    def geocode(address):
+        # OVER_QUERY_LIMIT / REQUEST_DENIED come back as 200s; only answers are cacheable
+        resp = http_get(GEOCODE_URL, params={"address": address, "key": api_key}, timeout=10,
+                        cache_if=_is_answer)
+        data = resp.json()
+        if data.get("status") == "ZERO_RESULTS":
+            return None
+        if data.get("status") != "OK":
+            raise RuntimeError(f"Geocoding failed for {address}: {data.get('status')}")
+        loc = data["results"][0]["geometry"]["location"]
+        return loc["lat"], loc["lng"]
+    return geocode
+
+
+def geocode_addresses(addresses: pd.Series, geocoder, cache: GeocodeCache = None,
+                      rate: float = RATE_PER_SEC, workers: int = MAX_WORKERS) -> pd.DataFrame:
+    """latitude/longitude for each address, aligned with `addresses.index`."""
+    cache = cache or GeocodeCache()
+    keys = normalize_address(addresses)
+    unique = [k for k in pd.unique(keys) if k]
+    coords = cache.get_many(unique)
+    misses = [k for k in unique if k not in coords]
+
+    if misses:
+        limiter = RateLimiter(rate)
+
+        def lookup(address):
+            limiter.wait()
+            try:
+                return address, geocoder(address), True
+            except Exception as e:
+                print("❌ Geocode failed:", e)
+                return address, None, False
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lookup, misses))
+        # only cache definite answers; errors get retried next batch
+        fetched = {a: c for a, c, ok in results if ok}
+        cache.put_many(fetched)
+        coords.update(fetched)
+
+    pairs = keys.map(lambda k: coords.get(k) or (None, None))
+    return pd.DataFrame(pairs.tolist(), index=addresses.index, columns=["latitude", "longitude"], dtype=float)
+
+
+def map_urls(df: pd.DataFrame):
+    """(Map, Street View) URL columns; None where there are no coordinates."""
+    if not {"latitude", "longitude"}.issubset(df.columns):
+        empty = pd.Series(None, index=df.index, dtype=object)
+        return empty, empty
+    has = df["latitude"].notna() & df["longitude"].notna()
+    coords = df["latitude"].astype(str) + "," + df["longitude"].astype(str)
+    return (MAP_URL + coords).where(has, None), (STREET_VIEW_URL + coords).where(has, None)
+
+
+def full_address(df: pd.DataFrame) -> pd.Series:
+    parts = [df[c].fillna("").astype(str) for c in ["address", "city", "state", "zip"] if c in df.columns]
+    return parts[0].str.cat(parts[1:], sep=" ") if parts else pd.Series("", index=df.index)
+
+
+def backfill_table(client, table: str, geocoder, page_size: int = 1000) -> int:
+    """Geocode rows missing coordinates and upsert them back in bulk.
+
+    Pages by id (keyset), so rows that can't be geocoded are passed over
+    instead of coming back as the first page forever.
+    """
+    updated, last_id = 0, None
+    while True:
+        query = client.table(table).select("*").is_("latitude", "null")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(page_size).execute().data or []
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        df = pd.DataFrame(rows)
+        df[["latitude", "longitude"]] = geocode_addresses(full_address(df), geocoder)
+        df = df.dropna(subset=["latitude", "longitude"])
+        if not df.empty:
+            records = df.astype(object).where(df.notna(), None).to_dict("records")
+            for i in range(0, len(records), BATCH_SIZE):
+                client.table(table).upsert(records[i:i + BATCH_SIZE]).execute()
+            updated += len(records)
+        if len(rows) < page_size:
+            break
+    return updated
+
+
+if __name__ == "__main__":
+    from supabase import create_client
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"])
+    n = backfill_table(client, "propstream_leads", google_geocoder(os.environ["GOOGLE_MAPS_API_KEY"]))
+    print(f"📍 Geocoded {n} PropStream leads")
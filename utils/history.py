@@ -0,0 +1,100 @@
+"""Partitioned run history and run-to-run diffs for build_leads.py.
+
+Every run is written as Parquet under
+
+    history/run=<run_id>/source=<source>/zip=<zip>/*.parquet
+
+and diffed against the previous run on a 64-bit hash of
+(source, normalized address, zip). The join is pandas' hash join on that
+key, and only the columns the diff needs are read back from the previous
+run.
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+HISTORY_DIR = os.getenv("LEAD_HISTORY_DIR", "history")
+ID_COLUMNS = ["source", "zip", "Property Address", "City", "State"]
+DIFF_COLUMNS = ["lead_key", "Amount Owed", "Estimated Value", *ID_COLUMNS]
+TOLERANCE = 1.0  # dollars; ignore float noise in re-exported values
+
+
+def add_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Add partition columns and the stable per-property `lead_key` hash."""
+    df = df.copy()
+    df["zip"] = df["Zip Code"].astype(str).str.extract(r"(\d{5})", expand=False).fillna("unknown")
+    address = (
+        df["Property Address"].fillna("").astype(str).str.upper()
+                              .str.replace(r"[^\w\s]", " ", regex=True)
+                              .str.split().str.join(" ")
+    )
+    keys = pd.DataFrame({"source": df["source"].astype(str), "address": address, "zip": df["zip"]})
+    df["lead_key"] = pd.util.hash_pandas_object(keys, index=False).to_numpy(dtype=np.uint64)
+    return df
+
+
+def write_run(df: pd.DataFrame, run_id: str) -> str:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = os.path.join(HISTORY_DIR, f"run={run_id}")
+    # the three exports disagree on types (e.g. ZIPs as int vs text)
+    text = df.columns[df.dtypes == object]
+    df = df.astype({c: "string" for c in text})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    pq.write_to_dataset(table, root_path=path, partition_cols=["source", "zip"])
+    return path
+
+
+def previous_run(before: str = None):
+    """run_id of the latest stored run (older than `before` if given)."""
+    runs = sorted(
+        os.path.basename(p).split("=", 1)[1]
+        for p in glob.glob(os.path.join(HISTORY_DIR, "run=*"))
+    )
+    if before:
+        runs = [r for r in runs if r < before]
+    return runs[-1] if runs else None
+
+
+def load_run(run_id: str, columns=DIFF_COLUMNS) -> pd.DataFrame:
+    import pyarrow.parquet as pq
+
+    df = pq.read_table(os.path.join(HISTORY_DIR, f"run={run_id}"), columns=columns).to_pandas()
+    # partition values come back as inferred categoricals (ZIPs as ints)
+    for col in ["source", "zip"]:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df
+
+
+def diff_runs(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """Rows that are new, removed, or whose lien/value changed since `previous`.
+
+    `change` is one of new / removed / lien_changed / value_changed /
+    lien_and_value_changed; prev_* columns hold the old numbers.
+    """
+    cur = current.drop_duplicates("lead_key", keep="last")
+    if previous is None or previous.empty:
+        return cur.assign(change="new")
+    prev = previous.drop_duplicates("lead_key", keep="last")[DIFF_COLUMNS].rename(columns={
+        "Amount Owed": "prev_owed", "Estimated Value": "prev_value",
+    })
+    merged = cur.merge(prev, on="lead_key", how="outer", indicator=True, suffixes=("", "_prev"))
+    # removed properties only exist on the previous side
+    for col in ID_COLUMNS:
+        merged[col] = merged[col].astype(object).fillna(merged.pop(f"{col}_prev").astype(object))
+
+    both = merged["_merge"] == "both"
+    lien = both & ~np.isclose(merged["Amount Owed"], merged["prev_owed"], atol=TOLERANCE, equal_nan=True)
+    value = both & ~np.isclose(merged["Estimated Value"], merged["prev_value"], atol=TOLERANCE, equal_nan=True)
+
+    change = np.select(
+        [merged["_merge"] == "left_only", merged["_merge"] == "right_only", lien & value, lien, value],
+        ["new", "removed", "lien_and_value_changed", "lien_changed", "value_changed"],
+        default="",
+    )
+    delta = merged.assign(change=change)
+    return delta[delta["change"] != ""].drop(columns="_merge")
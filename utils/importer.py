@@ -0,0 +1,203 @@
+"""Bulk CSV/XLSX import into the shared lead schema.
+
+Every county/PropStream/ArcGIS export names the same fields differently
+("SitusZip", "Recording Postal Code", "Zip Code"…). A file's header row is
+fingerprinted, the fingerprint is matched against IMPORT_MAPPINGS_FILE, and
+only an unseen layout goes through synonym detection — the result is saved
+there so it can be reviewed or hand-corrected once for every future file
+with that layout.
+
+Headers and mappings are resolved in the parent process; the files
+themselves are parsed in a process pool, one file per core.
+
+    python -m utils.importer exports/*.csv     # → imported_leads.csv
+"""
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+IMPORT_MAPPINGS_FILE = os.getenv("IMPORT_MAPPINGS_FILE", "import_mappings.json")
+
+# shared lead schema (PropStream export names) → header synonyms, normalized
+SYNONYMS = {
+    "Property Address":   ["property address", "address", "site address", "situs address", "recording address",
+                           "street address", "prop address", "property street address"],
+    "City":               ["city", "property city", "site city", "situs city", "recording city"],
+    "State":              ["state", "property state", "site state", "situs state", "recording state"],
+    "Zip Code":           ["zip code", "zip", "zipcode", "postal code", "property zip", "site zip", "situs zip",
+                           "recording postal code"],
+    "Amount Owed":        ["amount owed", "owed", "lien amt", "lien amount", "mortgage balance", "loan balance",
+                           "total loan balance", "open mortgage balance", "total open loans"],
+    "Estimated Value":    ["estimated value", "est value", "market value", "estimated market value", "avm",
+                           "property value", "total value"],
+    "Living Square Feet": ["living square feet", "living sqft", "sqft", "square feet", "building sqft", "living area"],
+    "Bedrooms":           ["bedrooms", "beds", "bed"],
+    "Bathrooms":          ["bathrooms", "baths", "bath"],
+}
+REQUIRED = ["Property Address"]
+NUMERIC = ["Amount Owed", "Estimated Value", "Living Square Feet", "Bedrooms", "Bathrooms"]
+
+
+def normalize_header(name) -> str:
+    """'RecordingPostalCode' / 'Recording_Postal_Code' → 'recording postal code'."""
+    name = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", " ", str(name))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+def fingerprint(headers) -> str:
+    return hashlib.sha1("|".join(sorted(normalize_header(h) for h in headers)).encode()).hexdigest()[:16]
+
+
+def detect_mapping(headers) -> dict:
+    """{raw header: schema column}; first synonym match wins, one header per column."""
+    by_norm = {normalize_header(h): h for h in headers}
+    mapping = {}
+    for column, synonyms in SYNONYMS.items():
+        for syn in synonyms:
+            raw = by_norm.get(syn)
+            if raw is not None and raw not in mapping:
+                mapping[raw] = column
+                break
+    return mapping
+
+
+def load_mappings(path: str = IMPORT_MAPPINGS_FILE) -> dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def mapping_for(headers, mappings: dict) -> tuple:
+    """(fingerprint, mapping, newly detected?) — cached layouts skip detection."""
+    fp = fingerprint(headers)
+    if fp in mappings:
+        return fp, mappings[fp]["columns"], False
+    return fp, detect_mapping(headers), True
+
+
+def save_mappings(mappings: dict, path: str = IMPORT_MAPPINGS_FILE):
+    with open(path, "w") as f:
+        json.dump(mappings, f, indent=2, sort_keys=True)
+
+
+def standardize(df: pd.DataFrame, mapping: dict = None) -> pd.DataFrame:
+    """Rename to the lead schema, keep only mapped columns, coerce money/size fields."""
+    if mapping is None:
+        mappings = load_mappings()
+        fp, mapping, new = mapping_for(df.columns, mappings)
+        if new:
+            mappings[fp] = {"headers": [str(c) for c in df.columns], "columns": mapping}
+            save_mappings(mappings)
+    missing = [c for c in REQUIRED if c not in mapping.values()]
+    if missing:
+        raise ValueError(f"No column found for {', '.join(missing)} in {list(df.columns)}")
+    out = df[list(mapping)].rename(columns=mapping)
+    for col in NUMERIC:
+        if col in out.columns:
+            out[col] = pd.to_numeric(out[col].astype(str).str.replace(r"[$,\s]", "", regex=True), errors="coerce")
+    return out
+
+
+def read_headers(path: str) -> list:
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True)
+        try:
+            first = next(wb.active.iter_rows(max_row=1, values_only=True), ())
+        finally:
+            wb.close()
+        return [h for h in first if h is not None]
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _parse(path: str, mapping: dict) -> pd.DataFrame:
+    """Worker: read only the mapped columns of one file."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        df = pd.read_excel(path, usecols=list(mapping), dtype=str)
+    else:
+        df = pd.read_csv(path, usecols=list(mapping), dtype=str)
+    return standardize(df, mapping).assign(source_file=os.path.basename(path))
+
+
+def import_files(paths, workers: int = None) -> tuple:
+    """Parse many exports in parallel into one frame in the lead schema.
+
+    Returns (frame, report) where report has one dict per file: file, rows,
+    fingerprint, columns (mapping), new_layout, error.
+    """
+    mappings = load_mappings()
+    report, jobs = [], []
+    for path in paths:
+        entry = {"file": os.path.basename(path), "rows": 0, "error": None}
+        try:
+            headers = read_headers(path)
+            fp, mapping, new = mapping_for(headers, mappings)
+            entry.update(fingerprint=fp, columns=mapping, new_layout=new)
+            missing = [c for c in REQUIRED if c not in mapping.values()]
+            if missing:
+                raise ValueError(f"no column found for {', '.join(missing)}")
+            if new:
+                mappings[fp] = {"headers": [str(h) for h in headers], "columns": mapping}
+            jobs.append((path, mapping, entry))
+        except Exception as e:
+            print(f"⚠️ Skipping {entry['file']}: {e}")
+            entry["error"] = str(e)
+        report.append(entry)
+    if any(e.get("new_layout") and not e["error"] for e in report):
+        save_mappings(mappings)
+
+    frames = []
+    if jobs:
+        workers = min(workers or os.cpu_count() or 1, len(jobs))
+        if workers == 1:
+            results = [_safe_parse(path, mapping) for path, mapping, _ in jobs]
+        else:
+            # spawn, not fork: forking the threaded Streamlit server can deadlock
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = list(pool.map(_safe_parse, *zip(*[(p, m) for p, m, _ in jobs])))
+        for (_, _, entry), (df, error) in zip(jobs, results):
+            if error:
+                print(f"⚠️ Skipping {entry['file']}: {error}")
+                entry["error"] = error
+            else:
+                entry["rows"] = len(df)
+                frames.append(df)
+
+    columns = [*SYNONYMS, "source_file"]
+    combined = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    return combined[[c for c in columns if c in combined.columns]], report
+
+
+def _safe_parse(path, mapping):
+    try:
+        return _parse(path, mapping), None
+    except Exception as e:
+        return None, str(e)
+
+
+def expand_paths(args) -> list:
+    paths = []
+    for arg in args:
+        if os.path.isdir(arg):
+            paths += sorted(glob.glob(os.path.join(arg, "*.csv")) + glob.glob(os.path.join(arg, "*.xlsx")))
+        else:
+            paths += sorted(glob.glob(arg))
+    return paths
+
+
+if __name__ == "__main__":
+    df, report = import_files(expand_paths(sys.argv[1:]))
+    for entry in report:
+        status = entry["error"] or f"{entry['rows']:,} rows" + (" (new layout)" if entry.get("new_layout") else "")
+        print(f"  {entry['file']}: {status}")
+    df.to_csv("imported_leads.csv", index=False)
+    print(f"✅ Imported {len(df):,} leads from {len(report)} files → imported_leads.csv")
@@ -0,0 +1,229 @@
+"""Background jobs backed by a thread pool and a SQLite job table.
+
+A job is a frame of input rows plus a handler kind. Workers process rows one
+at a time and checkpoint results every few rows (or seconds), so a Streamlit
+rerun, a browser refresh or a process restart picks the job up where it
+stopped instead of starting over. A handler may also supply a `plan` that
+picks which rows to process and in what order; rows it never yields are
+recorded as skipped. When the plan is exhausted the handler's `finish`
+callback gets the full result frame (e.g. to bulk-insert it).
+
+Several processes can share one jobs.sqlite. A worker atomically claims a job
+(owner + heartbeat) before running it and refreshes the heartbeat at every
+checkpoint; `resume()` only takes over jobs whose heartbeat has gone stale,
+so a job another live process is running is never run twice.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+JOBS_DB = os.getenv("JOBS_DB", "jobs.sqlite")
+CHECKPOINT_EVERY = 25
+CHECKPOINT_SECONDS = 2.0
+MAX_WORKERS = 2
+HEARTBEAT_TIMEOUT = 120  # seconds without a checkpoint before a job counts as orphaned
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,          -- queued | running | done | failed
+    total INTEGER NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,         -- input rows, JSON records
+    params TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    owner TEXT,                    -- worker that claimed the job
+    heartbeat REAL,                -- epoch seconds of the owner's last checkpoint
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    row INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, row)
+);
+"""
+
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+
+class _LostClaim(Exception):
+    """Another worker took the job over (our heartbeat went stale)."""
+
+
+class JobQueue:
+    """handlers: {kind: (process_row, finish)} or {kind: (process_row, finish, plan)}.
+
+    process_row(row: dict, params: dict) -> dict of result columns
+    finish(results: DataFrame, params: dict) -> None, called once at the end
+    plan(rows: list, params: dict) -> iterable of row indices, consumed lazily
+        (default: every row in order); unvisited rows get {"skipped": True}
+    """
+
+    def __init__(self, handlers: dict, path: str = JOBS_DB, workers: int = MAX_WORKERS):
+        self.handlers = handlers
+        self.path = path
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._active = set()
+        self._lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {r["name"] for r in conn.execute("PRAGMA table_info(jobs)")}
+            for col, kind in [("owner", "TEXT"), ("heartbeat", "REAL")]:
+                if col not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {col} {kind}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def submit(self, kind: str, df: pd.DataFrame, params: dict = None) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, total, payload, params, owner, heartbeat, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, len(df), df.to_json(orient="records"), json.dumps(params or {}),
+                 self.owner, time.time(), _now(), _now()),
+            )
+        self._schedule(job_id)
+        return job_id
+
+    def resume(self):
+        """Re-schedule queued/running jobs whose owner stopped heartbeating."""
+        with self._connect() as conn:
+            ids = [r["id"] for r in conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') "
+                "AND (owner IS NULL OR heartbeat IS NULL OR heartbeat < ?)",
+                (time.time() - HEARTBEAT_TIMEOUT,),
+            )]
+        for job_id in ids:
+            self._schedule(job_id)
+        return ids
+
+    def _schedule(self, job_id):
+        with self._lock:
+            if job_id in self._active:
+                return
+            self._active.add(job_id)
+        self.pool.submit(self._run, job_id)
+
+    def status(self, job_id: str) -> dict:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, total, done, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def recent(self, limit: int = 20) -> list:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, kind, status, total, done, created_at FROM jobs ORDER BY created_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def results(self, job_id: str) -> pd.DataFrame:
+        """Input rows joined with whatever results are checkpointed so far."""
+        with self._connect() as conn:
+            job = conn.execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            done = conn.execute("SELECT row, result FROM job_results WHERE job_id = ?", (job_id,)).fetchall()
+        if job is None:
+            return pd.DataFrame()
+        df = pd.DataFrame(json.loads(job["payload"]))
+        if done:
+            res = pd.DataFrame([json.loads(r["result"]) for r in done], index=[r["row"] for r in done])
+            df = df.join(res)
+        return df
+
+    def _claim(self, job_id) -> bool:
+        """Atomically take the job unless another live worker holds it."""
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET owner = ?, heartbeat = ? WHERE id = ? AND status IN ('queued', 'running') "
+                "AND (owner IS NULL OR owner = ? OR heartbeat IS NULL OR heartbeat < ?)",
+                (self.owner, time.time(), job_id, self.owner, time.time() - HEARTBEAT_TIMEOUT),
+            )
+            return cur.rowcount == 1
+
+    def _run(self, job_id):
+        try:
+            if not self._claim(job_id):
+                return
+            with self._connect() as conn:
+                job = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                finished = {r[0] for r in conn.execute("SELECT row FROM job_results WHERE job_id = ?", (job_id,))}
+                conn.execute("UPDATE jobs SET status = 'running', updated_at = ? WHERE id = ?", (_now(), job_id))
+            process_row, finish, *plan = self.handlers[job["kind"]]
+            params = json.loads(job["params"])
+            rows = json.loads(job["payload"])
+            order = plan[0](rows, params) if plan else range(len(rows))
+
+            pending, visited, last = [], set(), time.monotonic()
+            for i in order:
+                visited.add(i)
+                if i in finished:
+                    continue
+                pending.append((job_id, i, json.dumps(process_row(rows[i], params), default=str)))
+                if len(pending) >= CHECKPOINT_EVERY or time.monotonic() - last >= CHECKPOINT_SECONDS:
+                    self._checkpoint(job_id, pending)
+                    pending, last = [], time.monotonic()
+            skipped = json.dumps({"skipped": True})
+            pending += [(job_id, i, skipped) for i in range(len(rows)) if i not in visited and i not in finished]
+            self._checkpoint(job_id, pending)
+
+            finish(self.results(job_id), params)
+            self._set_status(job_id, "done")
+        except _LostClaim:
+            print(f"⚠️ Job {job_id} was taken over by another worker")
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e}")
+            self._set_status(job_id, "failed", str(e))
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+
+    def _checkpoint(self, job_id, pending):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET heartbeat = ? WHERE id = ? AND owner = ?", (time.time(), job_id, self.owner)
+            )
+            if cur.rowcount != 1:
+                raise _LostClaim(job_id)
+            if pending:
+                conn.executemany("INSERT OR REPLACE INTO job_results VALUES (?, ?, ?)", pending)
+            conn.execute(
+                "UPDATE jobs SET done = (SELECT COUNT(*) FROM job_results WHERE job_id = ?), updated_at = ? WHERE id = ?",
+                (job_id, _now(), job_id),
+            )
+
+    def _set_status(self, job_id, status, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, _now(), job_id),
+            )
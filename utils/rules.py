@@ -0,0 +1,167 @@
+"""Buy-box rule engine.
+
+A buy box is a boolean expression over lead columns, e.g.
+
+    "arv >= 100000 and equity / arv >= 0.25"
+    "contains(title, 'cash', 'as-is') and price < 150000"
+
+Expressions are parsed and validated once when the RuleSet is built. One
+`evaluate` call then runs every box column-wise over the whole frame and
+returns a uint64 bitmask per lead (bit i set = box i matched). Columns are
+pulled and coerced once per call and identical sub-expressions shared by
+several boxes (e.g. "arv >= 100000") are computed once.
+
+Missing numbers count as 0, matching how every page already fills them; a
+comparison that hits 0/0 is simply False.
+"""
+import ast
+import json
+import operator
+import os
+import re
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+BUY_BOXES = {
+    # Leads Dashboard 🔥 column
+    "hot_lead": "equity / arv >= 0.25 and arv >= 100000 and equity >= 30000",
+    # Upload Leads qualification (equity_pct is a percentage)
+    "qualified": "arv >= 100000 and equity_pct >= 30",
+    # build_leads.py master list flag
+    "high_equity": "equity / arv >= 0.25",
+    # scrapers.py: equity when we have comps, otherwise the listing's wording
+    "craigslist_hot": (
+        "(arv > 0 and equity != 0 and equity / arv >= 0.25) or "
+        "((arv <= 0 or equity == 0) and contains(title, 'cash', 'as-is', 'must sell', "
+        "'motivated', 'investor', 'cheap', 'urgent', 'fast'))"
+    ),
+}
+# Extra investor buy boxes: {"name": "expression", ...}
+BUY_BOXES_FILE = os.getenv("BUY_BOXES_FILE", "buy_boxes.json")
+
+_BINOPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+_CMPOPS = {
+    ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Lt: operator.lt,
+    ast.LtE: operator.le, ast.Eq: operator.eq, ast.NotEq: operator.ne,
+}
+
+
+class _Frame:
+    """Column access for one evaluation: coerced once, memoized by node."""
+
+    def __init__(self, df, aliases):
+        self.df = df
+        self.aliases = aliases or {}
+        self.cols = {}
+        self.memo = {}
+
+    def _col(self, name):
+        col = self.aliases.get(name, name)
+        if col not in self.df.columns:
+            raise KeyError(f"Buy box needs column '{col}'")
+        return self.df[col]
+
+    def number(self, name):
+        if name not in self.cols:
+            self.cols[name] = pd.to_numeric(self._col(name), errors="coerce").fillna(0).to_numpy(dtype=float)
+        return self.cols[name]
+
+    def text(self, name):
+        key = ("text", name)
+        if key not in self.cols:
+            self.cols[key] = self._col(name).fillna("").astype(str).str.lower()
+        return self.cols[key]
+
+
+def _compile(node, expr):
+    key = ast.dump(node)
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        value = node.value
+        fn = lambda f: value
+    elif isinstance(node, ast.Name):
+        name = node.id
+        fn = lambda f: f.number(name)
+    elif isinstance(node, ast.BoolOp):
+        parts = [_compile(v, expr) for v in node.values]
+        op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        fn = lambda f: reduce(op, (p(f) for p in parts))
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub)):
+        inner = _compile(node.operand, expr)
+        op = np.logical_not if isinstance(node.op, ast.Not) else operator.neg
+        fn = lambda f: op(inner(f))
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINOPS:
+        left, right = _compile(node.left, expr), _compile(node.right, expr)
+        op = _BINOPS[type(node.op)]
+        fn = lambda f: op(left(f), right(f))
+    elif isinstance(node, ast.Compare) and all(type(o) in _CMPOPS for o in node.ops):
+        terms = [_compile(t, expr) for t in [node.left, *node.comparators]]
+        ops = [_CMPOPS[type(o)] for o in node.ops]
+        fn = lambda f: reduce(np.logical_and, (
+            op(terms[i](f), terms[i + 1](f)) for i, op in enumerate(ops)
+        ))
+    elif (
+        isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "contains"
+        and node.args and isinstance(node.args[0], ast.Name)
+        and all(isinstance(a, ast.Constant) and isinstance(a.value, str) for a in node.args[1:])
+    ):
+        name = node.args[0].id
+        pattern = "|".join(re.escape(a.value.lower()) for a in node.args[1:])
+        fn = lambda f: f.text(name).str.contains(pattern, regex=True).to_numpy(dtype=bool)
+    else:
+        raise ValueError(f"Unsupported syntax in buy box {expr!r}: {ast.unparse(node)}")
+
+    def memoized(f):
+        if key not in f.memo:
+            f.memo[key] = fn(f)
+        return f.memo[key]
+    return memoized
+
+
+class RuleSet:
+    """A compiled set of named buy boxes (at most 64, one bit each)."""
+
+    def __init__(self, boxes: dict):
+        if len(boxes) > 64:
+            raise ValueError("A RuleSet holds at most 64 buy boxes")
+        self.names = list(boxes)
+        self._boxes = [_compile(ast.parse(expr, mode="eval").body, expr) for expr in boxes.values()]
+
+    def evaluate(self, df: pd.DataFrame, aliases: dict = None) -> np.ndarray:
+        """Bitmask per row: bit i is set when buy box `self.names[i]` matches."""
+        frame = _Frame(df, aliases)
+        bits = np.zeros(len(df), dtype=np.uint64)
+        for i, box in enumerate(self._boxes):
+            bits |= _run(box, frame).astype(np.uint64) << np.uint64(i)
+        return bits
+
+    def mask(self, df: pd.DataFrame, name: str, aliases: dict = None) -> np.ndarray:
+        """Boolean mask for a single buy box."""
+        return _run(self._boxes[self.names.index(name)], _Frame(df, aliases))
+
+    def matches(self, df: pd.DataFrame, aliases: dict = None) -> pd.DataFrame:
+        """One boolean column per buy box, decoded from a single bitmask sweep."""
+        bits = self.evaluate(df, aliases)
+        return pd.DataFrame(
+            {n: (bits >> np.uint64(i)) & np.uint64(1) == 1 for i, n in enumerate(self.names)},
+            index=df.index,
+        )
+
+
+def _run(box, frame) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hit = np.asarray(box(frame), dtype=bool)
+    return np.broadcast_to(hit, len(frame.df)).copy()
+
+
+def load_rules(path: str = BUY_BOXES_FILE) -> RuleSet:
+    boxes = dict(BUY_BOXES)
+    if os.path.exists(path):
+        with open(path) as f:
+            boxes.update(json.load(f))
+    return RuleSet(boxes)
+
+
+RULES = load_rules()
@@ -0,0 +1,138 @@
+"""Full-text search over lead titles and post bodies (SQLite FTS5).
+
+Documents are keyed by (source, lead key) — the post link for Craigslist,
+the row id for PropStream — and updated in place, so indexing is
+incremental: the app indexes every row newer than the last one it synced,
+bodies included (scrapers.py stores each post's description in
+craigslist_leads.description).
+
+Each source gets its own FTS5 table so a query never has to filter by
+source after matching, and ranking is bm25 with titles weighted double.
+"""
+import os
+import re
+import sqlite3
+import threading
+
+import pandas as pd
+
+SEARCH_DB = os.getenv("SEARCH_DB", "lead_search.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS lead_docs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    lead_key TEXT NOT NULL,
+    UNIQUE (source, lead_key)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    source TEXT PRIMARY KEY,
+    watermark TEXT
+);
+"""
+
+
+def to_match_query(text: str) -> str:
+    """Plain words → FTS5 query where every word must match (porter-stemmed,
+    so "foreclosures" finds "foreclosure")."""
+    return " ".join(f'"{w}"' for w in re.findall(r"\w+", text.lower()))
+
+
+def _fts(source: str) -> str:
+    if not re.fullmatch(r"\w+", source):
+        raise ValueError(f"Bad search source: {source!r}")
+    return f"fts_{source}"
+
+
+class SearchIndex:
+    def __init__(self, path: str = SEARCH_DB):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self.lock = threading.Lock()
+        self._tables = set()
+
+    def _ensure(self, source: str) -> str:
+        table = _fts(source)
+        if table not in self._tables:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?", (table,)
+            ).fetchone()
+            if not exists:
+                with self.conn:
+                    self.conn.execute(
+                        f"CREATE VIRTUAL TABLE {table} USING fts5(title, body, tokenize = 'porter unicode61')"
+                    )
+                    self.conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('rank', 'bm25(2.0, 1.0)')")
+            self._tables.add(table)
+        return table
+
+    def upsert(self, docs):
+        """docs: iterable of (source, lead_key, title, body); body=None keeps the old body.
+
+        Bulk: one transaction, rows staged with executemany and moved into the
+        FTS table with set-based statements (last doc wins per lead key)."""
+        by_source = {}
+        for source, key, title, body in docs:
+            by_source.setdefault(source, []).append((str(key), title or "", body))
+        with self.lock, self.conn:
+            for source, rows in by_source.items():
+                table = self._ensure(source)
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch (lead_key TEXT PRIMARY KEY, title TEXT, body TEXT)")
+                self.conn.execute("DELETE FROM temp.batch")
+                self.conn.executemany("INSERT OR REPLACE INTO temp.batch VALUES (?, ?, ?)", rows)
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO lead_docs (source, lead_key) SELECT ?, lead_key FROM temp.batch", (source,)
+                )
+                self.conn.execute("DROP TABLE IF EXISTS temp.staged")
+                self.conn.execute(
+                    f"CREATE TEMP TABLE staged AS"
+                    f" SELECT d.id, b.title, COALESCE(b.body, f.body, '') AS body FROM temp.batch b"
+                    f" JOIN lead_docs d ON d.source = ? AND d.lead_key = b.lead_key"
+                    f" LEFT JOIN {table} f ON f.rowid = d.id",
+                    (source,),
+                )
+                self.conn.execute(f"DELETE FROM {table} WHERE rowid IN (SELECT id FROM temp.staged)")
+                self.conn.execute(f"INSERT INTO {table} (rowid, title, body) SELECT id, title, body FROM temp.staged")
+                self.conn.execute("DROP TABLE temp.staged")
+
+    def sync_frame(self, df: pd.DataFrame, source: str, key_col: str, title_col: str = "title",
+                   body_col: str = None, time_col: str = "date_posted") -> int:
+        """Index rows at or after what this source last synced (`>=`, so rows
+        sharing the boundary timestamp aren't skipped; re-indexing is idempotent)."""
+        if df.empty:
+            return 0
+        (watermark,) = self.conn.execute(
+            "SELECT watermark FROM sync_state WHERE source = ?", (source,)
+        ).fetchone() or (None,)
+        times = pd.to_datetime(df[time_col], errors="coerce", utc=True)
+        new = df[times >= pd.Timestamp(watermark)] if watermark else df
+        if new.empty:
+            return 0
+        new = new.drop_duplicates(key_col, keep="last")
+        if body_col and body_col in new.columns:
+            bodies = new[body_col].astype(object).where(new[body_col].notna(), None)
+        else:
+            bodies = [None] * len(new)
+        self.upsert(zip([source] * len(new), new[key_col], new[title_col], bodies))
+        latest = times.max()
+        if pd.notna(latest):
+            with self.lock, self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?)", (source, latest.isoformat()))
+        return len(new)
+
+    def search(self, text: str, source: str, limit: int = 200) -> pd.DataFrame:
+        """Ranked matches (best first) with a highlighted snippet."""
+        query = to_match_query(text)
+        if not query:
+            return pd.DataFrame(columns=["lead_key", "rank", "snippet"])
+        table = self._ensure(source)
+        sql = (
+            f"SELECT d.lead_key, m.rank, m.snip FROM ("
+            f"  SELECT rowid, rank, snippet({table}, -1, '**', '**', '…', 12) AS snip"
+            f"  FROM {table} WHERE {table} MATCH ? ORDER BY rank LIMIT ?"
+            f") m JOIN lead_docs d ON d.id = m.rowid ORDER BY m.rank"
+        )
+        with self.lock:
+            rows = self.conn.execute(sql, (query, limit)).fetchall()
+        return pd.DataFrame(rows, columns=["lead_key", "rank", "snippet"])
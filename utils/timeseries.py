@@ -0,0 +1,103 @@
+"""Bounded-size time series for the price charts.
+
+Two ways to shrink "every lead is a point" before it reaches Altair:
+
+- `resample`: per-source day/week buckets with min/median/max, all in one
+  lexsort over (source, bucket, value).
+- `downsample`: Largest-Triangle-Three-Buckets per source, keeping the
+  visual shape within a fixed point budget.
+
+Either way the chart payload depends on the date range and budget, not on
+how many leads exist.
+"""
+import numpy as np
+import pandas as pd
+
+NS_PER_DAY = 86_400 * 10**9
+POINT_BUDGET = 1500
+
+
+def _clean(df, time_col, value_col, group_col):
+    t = pd.to_datetime(df[time_col], errors="coerce", utc=True)
+    v = pd.to_numeric(df[value_col], errors="coerce")
+    ok = (t.notna() & v.notna()).to_numpy()
+    # naive UTC ns since epoch, whatever resolution pandas picked
+    ticks = t[ok].dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").astype(np.int64)
+    values = v[ok].to_numpy(dtype=float)
+    groups = df[group_col][ok].to_numpy() if group_col else np.zeros(ok.sum(), dtype=int)
+    return ticks, values, groups
+
+
+def resample(df: pd.DataFrame, time_col: str, value_col: str, group_col: str = None, freq: str = "W") -> pd.DataFrame:
+    """One row per (group, bucket): bucket start, min, median, max, count."""
+    ticks, values, groups = _clean(df, time_col, value_col, group_col)
+    cols = ["group", "bucket", "min", "median", "max", "count"]
+    if not len(values):
+        return pd.DataFrame(columns=cols)
+
+    days = ticks // NS_PER_DAY
+    if freq == "W":
+        days = days - (days + 3) % 7  # 1970-01-01 was a Thursday; floor to Monday
+    elif freq != "D":
+        raise ValueError(f"Unsupported freq: {freq}")
+    codes, labels = pd.factorize(groups)
+
+    order = np.lexsort((values, days, codes))
+    days, codes, values = days[order], codes[order], values[order]
+    change = np.flatnonzero((np.diff(days) != 0) | (np.diff(codes) != 0)) + 1
+    starts = np.concatenate([[0], change])
+    ends = np.concatenate([change, [len(values)]])
+    counts = ends - starts
+    median = (values[starts + (counts - 1) // 2] + values[starts + counts // 2]) / 2
+
+    return pd.DataFrame({
+        "group": np.asarray(labels)[codes[starts]],
+        "bucket": pd.to_datetime(days[starts] * NS_PER_DAY),
+        "min": values[starts],
+        "median": median,
+        "max": values[ends - 1],
+        "count": counts,
+    })
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps (x sorted)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        # average of the next bucket is the third triangle vertex
+        cx, cy = x[hi:nxt_hi].mean(), y[hi:nxt_hi].mean()
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(df: pd.DataFrame, time_col: str, value_col: str, group_col: str = None,
+               budget: int = POINT_BUDGET) -> pd.DataFrame:
+    """Rows of `df` chosen by LTTB, the budget split across groups by size."""
+    ticks, values, groups = _clean(df, time_col, value_col, group_col)
+    t = pd.to_datetime(df[time_col], errors="coerce", utc=True)
+    df = df[(t.notna() & pd.to_numeric(df[value_col], errors="coerce").notna()).to_numpy()]
+    if len(df) <= budget:
+        return df.sort_values(time_col)
+
+    ticks = ticks.astype(float)
+    codes, _ = pd.factorize(groups)
+    sizes = np.bincount(codes)
+
+    picked = []
+    for code, size in enumerate(sizes):
+        members = np.flatnonzero(codes == code)
+        members = members[np.argsort(ticks[members], kind="stable")]
+        n_out = max(3, int(budget * size / len(df)))
+        picked.append(members[lttb(ticks[members], values[members], n_out)])
+    return df.iloc[np.concatenate(picked)]
@@ -0,0 +1,174 @@
+"""Shared HTTP transport for every fetcher.
+
+- one pooled `requests.Session` per host (keep-alive, retries on 5xx)
+- gzip/deflate (and br when brotli is installed) accepted everywhere
+- on-disk response cache that honors Cache-Control/Expires and revalidates
+  with If-None-Match / If-Modified-Since, so unchanged pages cost a 304
+- HTTP_MODE=record saves every response; HTTP_MODE=replay serves only saved
+  responses (no network), for deterministic offline scraper/benchmark runs
+- callers can veto caching a 200 (`cache_if`) when the body is an error
+  payload, and API keys are stripped from the URL stored on disk
+"""
+import email.utils
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", ".http_cache")
+HTTP_MODE = os.getenv("HTTP_MODE", "live")   # live | record | replay
+DEFAULT_TIMEOUT = 15
+POOL_SIZE = 10
+SECRET_PARAMS = {"key", "api_key", "apikey", "access_token", "token", "client_secret", "signature", "sig"}
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes br only when this is importable)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def session_for(url: str) -> requests.Session:
+    host = requests.utils.urlparse(url).netloc
+    with _lock:
+        if host not in _sessions:
+            s = requests.Session()
+            retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retry)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            s.headers["Accept-Encoding"] = ACCEPT_ENCODING
+            _sessions[host] = s
+        return _sessions[host]
+
+
+def _paths(url: str):
+    key = hashlib.sha256(url.encode()).hexdigest()
+    base = os.path.join(HTTP_CACHE_DIR, key[:2], key)
+    return base + ".json", base + ".body"
+
+
+def _load(url: str):
+    meta_path, body_path = _paths(url)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            return meta, f.read()
+    except (OSError, ValueError):
+        return None
+
+
+def _atomic_write(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _redact(url: str) -> str:
+    """URL with secret query parameters (API keys, tokens) masked."""
+    parts = urlsplit(url)
+    query = [(k, "REDACTED" if k.lower() in SECRET_PARAMS else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def _store(url: str, resp: requests.Response, body: bytes, ttl: float):
+    headers = {k: v for k, v in resp.headers.items() if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")}
+    # the cache key is a hash of the full URL; only the readable copy is redacted
+    meta = {"url": _redact(url), "status": resp.status_code, "reason": resp.reason, "headers": headers, "stored_at": time.time(), "ttl": ttl}
+    meta_path, body_path = _paths(url)
+    _atomic_write(body_path, body)
+    _atomic_write(meta_path, json.dumps(meta).encode())
+    return meta
+
+
+def _lifetime(meta: dict) -> float:
+    """Seconds the cached response stays fresh without revalidating."""
+    cc = CaseInsensitiveDict(meta["headers"]).get("Cache-Control", "").lower()
+    if "no-cache" in cc or "no-store" in cc:
+        return 0
+    m = re.search(r"max-age=(\d+)", cc)
+    if m:
+        return max(int(m.group(1)), meta.get("ttl") or 0)
+    expires = CaseInsensitiveDict(meta["headers"]).get("Expires")
+    if expires:
+        try:
+            return max(email.utils.parsedate_to_datetime(expires).timestamp() - meta["stored_at"], meta.get("ttl") or 0)
+        except (TypeError, ValueError):
+            pass
+    return meta.get("ttl") or 0
+
+
+def _cacheable(resp: requests.Response, ttl: float) -> bool:
+    if resp.status_code != 200 or "no-store" in resp.headers.get("Cache-Control", "").lower():
+        return False
+    return bool(ttl or resp.headers.get("ETag") or resp.headers.get("Last-Modified") or "max-age" in resp.headers.get("Cache-Control", ""))
+
+
+def _response(meta: dict, body: bytes, source: str) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = meta["status"]
+    resp.reason = meta.get("reason")
+    resp.url = meta["url"]
+    resp.headers = CaseInsensitiveDict(meta["headers"])
+    resp.headers["X-Cache"] = source
+    resp.encoding = requests.utils.get_encoding_from_headers(resp.headers)
+    resp._content = body
+    return resp
+
+
+def get(url: str, params=None, headers=None, timeout: float = DEFAULT_TIMEOUT, ttl: float = 0, mode: str = None,
+        cache_if=None, **kwargs):
+    """GET through the shared session and response cache.
+
+    `ttl` keeps a response fresh for at least that many seconds even when the
+    server sends no caching headers (e.g. ArcGIS query results). `cache_if`
+    (response -> bool) lets the caller refuse to cache a 200 whose body is
+    really an error or throttle message.
+    """
+    mode = mode or HTTP_MODE
+    full_url = requests.Request("GET", url, params=params).prepare().url
+    cached = _load(full_url)
+
+    if mode == "replay":
+        if cached is None:
+            raise LookupError(f"No recorded response for {_redact(full_url)}")
+        return _response(*cached, source="REPLAY")
+    if cached and mode != "record" and time.time() - cached[0]["stored_at"] < _lifetime(cached[0]):
+        return _response(*cached, source="HIT")
+
+    headers = dict(headers or {})
+    if cached and mode != "record":
+        validators = CaseInsensitiveDict(cached[0]["headers"])
+        if validators.get("ETag"):
+            headers["If-None-Match"] = validators["ETag"]
+        if validators.get("Last-Modified"):
+            headers["If-Modified-Since"] = validators["Last-Modified"]
+
+    resp = session_for(full_url).get(full_url, headers=headers, timeout=timeout, **kwargs)
+
+    if resp.status_code == 304 and cached:
+        meta, body = cached
+        meta["headers"].update({k: v for k, v in resp.headers.items() if k.lower() in ("cache-control", "expires", "etag", "date")})
+        meta["stored_at"] = time.time()
+        meta["url"] = _redact(meta["url"])  # entries written before redaction
+        _atomic_write(_paths(full_url)[0], json.dumps(meta).encode())
+        return _response(meta, body, source="REVALIDATED")
+
+    if mode == "record" or (_cacheable(resp, ttl) and (cache_if is None or cache_if(resp))):
+        _store(full_url, resp, resp.content, ttl)
+    return resp